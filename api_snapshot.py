@@ -0,0 +1,63 @@
+"""
+Snapshot de l'API du dashboard: sérialisé une fois par cycle, servi tel quel
+"""
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field, replace
+
+from wire_format import encode_json, decode_json, compact_payload, compress
+
+
+@dataclass(frozen=True)
+class ApiSnapshot:
+    """Payload JSON pré-encodé et immuable"""
+    version: int
+    etag: str        # Sans guillemets (ajoutés par Response.set_etag)
+    body: bytes
+    created_at: float
+    seq: int = 0     # Séquence du flux de changements couverte par ce snapshot
+    variants: dict = field(default_factory=dict, repr=False, compare=False)
+
+    def variant(self, schema: str = 'full', encoding: str = 'identity') -> bytes:
+        """Corps dans le schéma ('full'/'compact') et l'encodage demandés, calculé une fois par version"""
+        key = (schema, encoding)
+        body = self.variants.get(key)
+        if body is None:
+            if encoding != 'identity':
+                body = compress(self.variant(schema), encoding)
+            elif schema == 'compact':
+                body = encode_json(compact_payload(decode_json(self.body)))
+            else:
+                body = self.body
+            self.variants[key] = body
+        return body
+
+    def variant_etag(self, schema: str = 'full', encoding: str = 'identity') -> str:
+        """ETag distinct par représentation (schéma et Content-Encoding)"""
+        etag = self.etag if schema == 'full' else f"{self.etag}-c"
+        return etag if encoding == 'identity' else f"{etag}-{encoding}"
+
+
+class SnapshotPublisher:
+    """Publie un nouveau snapshot seulement quand le contenu change"""
+
+    def __init__(self):
+        self.current = None
+        self._lock = threading.Lock()
+
+    def publish(self, payload: dict, seq: int = 0) -> ApiSnapshot:
+        body = encode_json(payload)
+        digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+        with self._lock:
+            current = self.current
+            if current is not None and current.etag.endswith(digest):
+                if current.seq != seq:
+                    # Même contenu (même ETag et variantes), mais couvrant la séquence actuelle:
+                    # sinon un client delta à jour recevrait un reset à chaque appel
+                    self.current = replace(current, seq=seq)
+                return self.current
+            version = current.version + 1 if current else 1
+            self.current = ApiSnapshot(version, f"{version}-{digest}", body, time.time(), seq)
+            return self.current
@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+Backtest hors ligne de la stratégie sur des bougies OHLCV locales (CSV, Parquet ou .npy)
+Signaux (confiance, levier) calculés en bloc avec NumPy; mêmes règles que le moteur:
+seuils de position_rules, levier de l'analyseur et contrôle de capital à l'ouverture
+"""
+
+import argparse
+import glob
+import heapq
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import position_rules
+
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reports')
+TIME_COLUMNS = ('timestamp', 'time', 'open_time', 'date', 'datetime')
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+STABLE_PAIRS = ('BTC/USDC', 'ETH/USDC')  # Bonus de confiance de l'analyseur
+SECONDS_PER_YEAR = 365 * 86400           # Marché ouvert en continu
+STATUSES = ('STOP_LOSS', 'TAKE_PROFIT', 'LIQUIDATION', 'END')
+STOP_LOSS, TAKE_PROFIT, LIQUIDATION, END = range(len(STATUSES))
+
+
+# --- Données
+
+@dataclass
+class PairBars:
+    """Bougies d'une paire en colonnes (temps en epoch secondes, croissant)"""
+    pair: str
+    time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    def __len__(self):
+        return len(self.time)
+
+    def step(self) -> float:
+        """Durée d'une bougie (médiane des écarts)"""
+        if len(self) < 2:
+            return 60.0
+        return float(np.median(np.diff(self.time[:10000])))
+
+
+def pair_from_path(path: str) -> str:
+    """'ETH_USDC.csv', 'ETHUSDT.parquet', 'eth.csv' -> 'ETH/USDC'"""
+    stem = os.path.splitext(os.path.basename(path))[0].upper()
+    match = re.match(r'([A-Z0-9]+?)[-_]?(USDC|USDT|USD)?$', stem)
+    return f"{match.group(1) if match else stem}/USDC"
+
+
+def to_epoch_seconds(values) -> np.ndarray:
+    """Colonne de temps (epoch s/ms ou dates) -> epoch en secondes"""
+    if pd.api.types.is_numeric_dtype(values):
+        seconds = values.to_numpy(dtype=np.float64)
+        if len(seconds) and np.nanmax(seconds) > 1e11:
+            seconds = seconds / 1000  # Millisecondes
+        return seconds
+    dates = pd.to_datetime(values, utc=True)
+    return ((dates - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)).to_numpy(dtype=np.float64)
+
+
+def load_bars(path: str, pair: str = None) -> PairBars:
+    """Bougies d'un fichier CSV ou Parquet (colonnes temps + open/high/low/close), ou .npy"""
+    if path.endswith('.npy'):
+        # Tableau (5, n) écrit par save_dataset_npy, projeté en mémoire (pages partagées entre processus)
+        rows = np.load(path, mmap_mode='r')
+        return PairBars(pair or pair_from_path(path), *rows)
+    if path.endswith('.parquet'):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path)
+    frame.columns = [str(column).strip().lower() for column in frame.columns]
+    time_column = next((column for column in TIME_COLUMNS if column in frame.columns), None)
+    if time_column is None:
+        raise ValueError(f"{path}: colonne de temps absente ({', '.join(TIME_COLUMNS)})")
+    missing = [column for column in PRICE_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"{path}: colonnes manquantes {', '.join(missing)}")
+
+    times = to_epoch_seconds(frame[time_column])
+    prices = frame[list(PRICE_COLUMNS)].to_numpy(dtype=np.float64)
+    # Ordre chronologique, une seule bougie par horodatage (la dernière)
+    order = np.argsort(times, kind='stable')
+    times, prices = times[order], prices[order]
+    keep = np.append(times[1:] != times[:-1], True)
+    times, prices = times[keep], prices[keep]
+    return PairBars(pair or pair_from_path(path), times, *(np.ascontiguousarray(prices[:, i]) for i in range(4)))
+
+
+def load_dataset(paths) -> dict:
+    """{paire: PairBars} depuis des fichiers ou des dossiers (*.csv, *.parquet, *.npy)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, '*.csv')) + glob.glob(os.path.join(path, '*.parquet'))
+                            + glob.glob(os.path.join(path, '*.npy')))
+        else:
+            files.append(path)
+    dataset = {}
+    for path in files:
+        bars = load_bars(path)
+        dataset[bars.pair] = bars
+    return dataset
+
+
+def save_dataset_npy(dataset: dict, directory: str) -> list:
+    """Écrit chaque paire en .npy (5, n): time, open, high, low, close; renvoie les chemins"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for pair, bars in dataset.items():
+        path = os.path.join(directory, pair.replace('/', '_') + '.npy')
+        np.save(path, np.vstack((bars.time, bars.open, bars.high, bars.low, bars.close)))
+        paths.append(path)
+    return paths
+
+
+# --- Paramètres
+
+@dataclass
+class BacktestParams:
+    """Paramètres de la simulation (défauts = moteur principal et son analyseur)"""
+    initial_balance: float = 1000.0
+    position_fraction: float = 0.1          # Marge par position (10% du capital)
+    max_margin_usage_pct: float = 100.0     # Marge totale engagée max (% du capital)
+    max_exposure_multiple: float = 10.0     # Exposition totale max (x capital)
+    max_position_multiple: float = 2.0      # Exposition d'une position max (x capital)
+    entry_confidence: float = 75.0          # Ouverture si confiance > seuil...
+    entry_leverage: float = 1.5             # ... et levier recommandé > seuil
+    max_leverage: dict = field(default_factory=dict)     # paire -> levier max
+    default_max_leverage: float = 10.0
+    min_confidence: dict = field(default_factory=dict)   # paire -> confiance min pour du levier
+    default_min_confidence: float = 60.0
+    leverage_cap: float = 10.0              # Limite globale du levier
+    max_volatility_for_full_leverage: float = 8.0   # Au-delà: levier limité à 3x
+    max_volatility_for_leverage: float = None       # Au-delà: pas de levier (None: pas de limite)
+    volatility_reduction_factor: float = 0.5        # Plancher du facteur de volatilité
+    stop_loss_pct: float = position_rules.STOP_LOSS_PCT
+    take_profit_pct: float = position_rules.TAKE_PROFIT_PCT
+    trend_periods: list = field(default_factory=lambda: [5, 10, 20])
+    volatility_window: int = 20
+    min_history_length: int = 10
+    equity_step: float = 3600.0             # Pas de la courbe d'équité (secondes)
+
+    def pair_max_leverage(self, pair: str) -> float:
+        return float(self.max_leverage.get(pair, self.default_max_leverage))
+
+    def pair_min_confidence(self, pair: str) -> float:
+        return float(self.min_confidence.get(pair, self.default_min_confidence))
+
+    def indicator_key(self) -> tuple:
+        """Paramètres dont dépendent les indicateurs (clé de cache)"""
+        return tuple(sorted(self.trend_periods)), self.volatility_window, self.min_history_length
+
+    @classmethod
+    def from_config(cls, config, **overrides) -> 'BacktestParams':
+        """Paramètres d'un IntelligentLeverageConfig (levier de calculate_optimal_leverage)"""
+        trading, leverage, strategy = config.trading, config.leverage, config.strategy
+        values = dict(
+            max_leverage=dict(leverage.crypto_max_leverage),
+            default_max_leverage=10.0,
+            min_confidence=dict(leverage.min_confidence_thresholds),
+            default_min_confidence=70.0,
+            leverage_cap=float(trading.max_leverage),
+            max_volatility_for_full_leverage=leverage.max_volatility_for_full_leverage,
+            max_volatility_for_leverage=leverage.max_volatility_for_full_leverage * 2,
+            volatility_reduction_factor=leverage.volatility_reduction_factor,
+            max_margin_usage_pct=leverage.max_margin_usage_pct,
+            entry_confidence=trading.min_confidence_for_leverage,
+            stop_loss_pct=trading.leverage_stop_loss_pct,
+            take_profit_pct=trading.leverage_take_profit_pct,
+            trend_periods=list(strategy.trend_analysis_periods),
+            volatility_window=strategy.volatility_window,
+            min_history_length=strategy.min_price_history_length
+        )
+        values.update(overrides)
+        return cls(**values)
+
+
+# --- Indicateurs (vectorisés, mêmes formules que IntelligentLeverageAnalyzer)
+
+@dataclass
+class Indicators:
+    confidence: np.ndarray
+    volatility: np.ndarray  # En pourcentage
+
+
+def rolling_sum(values: np.ndarray, width: int) -> np.ndarray:
+    """Somme des `width` dernières valeurs à chaque indice (moins en début de série)"""
+    cumulative = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    end = np.arange(1, len(values) + 1)
+    return cumulative[end] - cumulative[np.maximum(end - width, 0)]
+
+
+def trend_strength(closes: np.ndarray, periods) -> tuple:
+    """(force moyenne des tendances disponibles, nb de périodes disponibles) par bougie"""
+    signs = np.zeros(len(closes))
+    signs[1:] = np.sign(np.diff(closes))
+    available_prices = np.arange(1, len(closes) + 1)
+    total = np.zeros(len(closes))
+    count = np.zeros(len(closes))
+    for period in periods:
+        ratio = rolling_sum(signs, period - 1) / (period - 1)
+        strength = np.select([ratio >= 0.75, ratio >= 0.5, ratio <= -0.75, ratio <= -0.5],
+                             [80.0, 65.0, 80.0, 65.0], 50.0)
+        available = available_prices >= period
+        total += np.where(available, strength, 0.0)
+        count += available
+    return np.divide(total, count, out=np.zeros_like(total), where=count > 0), count
+
+
+def rolling_volatility(closes: np.ndarray, window: int) -> np.ndarray:
+    """Écart-type (population) des `window` derniers rendements, en pourcentage"""
+    returns = np.zeros(len(closes))
+    returns[1:] = np.diff(closes) / closes[:-1]
+    n = np.minimum(np.arange(len(closes)), window).astype(np.float64)
+    s1 = rolling_sum(returns, window)
+    s2 = rolling_sum(returns * returns, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = np.where(n > 0, s2 / n - (s1 / n) ** 2, 0.0)
+    return np.sqrt(np.maximum(variance, 0.0)) * 100
+
+
+def change_24h(bars: PairBars) -> np.ndarray:
+    """Variation (%) sur 24h glissantes (depuis la première bougie au début)"""
+    lag = max(int(round(86400 / bars.step())), 1)
+    reference = np.empty_like(bars.close)
+    reference[:lag] = bars.open[0]
+    reference[lag:] = bars.close[:-lag]
+    return (bars.close / reference - 1.0) * 100
+
+
+def compute_indicators(bars: PairBars, params: BacktestParams) -> Indicators:
+    """Confiance et volatilité de chaque bougie (sans regarder les bougies suivantes)"""
+    strength, periods_available = trend_strength(bars.close, sorted(params.trend_periods))
+    volatility = rolling_volatility(bars.close, params.volatility_window)
+    move = np.abs(change_24h(bars))
+
+    score = strength.copy()
+    score += np.where((volatility >= 2) & (volatility <= 5), 10.0, 0.0)
+    score -= np.where(volatility > 10, 15.0, 0.0)
+    score += np.where((move >= 3) & (move <= 8), 15.0, 0.0)
+    score -= np.where(move > 15, 10.0, 0.0)
+    if bars.pair in STABLE_PAIRS:
+        score += 5.0
+    confidence = np.clip(score, 30.0, 95.0)
+    confidence[periods_available == 0] = 40.0
+    # Moteur: signaux analysés seulement à partir de min_history_length bougies
+    confidence[:max(params.min_history_length - 1, 0)] = 40.0
+    return Indicators(confidence, volatility)
+
+
+def recommend_leverage(confidence, volatility, max_leverage, min_confidence, params: BacktestParams):
+    """Version vectorisée de recommend_leverage / calculate_optimal_leverage"""
+    confidence_ratio = (confidence - min_confidence) / (95 - min_confidence)
+    volatility_factor = np.maximum(params.volatility_reduction_factor, 1.0 - volatility / 20)
+    leverage = 1.0 + (max_leverage - 1.0) * confidence_ratio * volatility_factor
+    leverage = np.where(volatility > params.max_volatility_for_full_leverage, np.minimum(leverage, 3.0), leverage)
+    leverage = np.maximum(1.0, np.minimum(max_leverage, np.minimum(leverage, params.leverage_cap)))
+    no_leverage = confidence < min_confidence
+    if params.max_volatility_for_leverage is not None:
+        no_leverage |= volatility > params.max_volatility_for_leverage
+    return np.where(no_leverage, 1.0, leverage)
+
+
+# --- Simulation
+
+def first_exit(bars: PairBars, start: int, stop: int, stop_level: float, take_profit: float):
+    """Première bougie de [start, stop) qui touche le stop ou le take-profit
+
+    Recherche par blocs de taille croissante: coût proportionnel à la durée de la position
+    """
+    chunk = 64
+    while start < stop:
+        end = min(stop, start + chunk)
+        hit = (bars.low[start:end] <= stop_level) | (bars.high[start:end] >= take_profit)
+        if hit.any():
+            return start + int(np.argmax(hit))
+        start = end
+        chunk *= 4
+    return None
+
+
+@dataclass
+class BacktestResult:
+    params: BacktestParams
+    pairs: list
+    start: float
+    end: float
+    trades: dict           # Colonnes: pair, entry/exit time, prix, levier, taille, marge, pnl, status
+    equity_time: np.ndarray
+    equity: np.ndarray
+    elapsed: float = 0.0
+    ruined_at: float = None  # Fermeture ayant ramené le capital réalisé à zéro (plus aucune ouverture)
+
+    def metrics(self) -> dict:
+        pnl = self.trades['pnl']
+        status = self.trades['status']
+        total_pnl = float(pnl.sum())
+        return {
+            'initial_balance': self.params.initial_balance,
+            'final_value': self.params.initial_balance + total_pnl,
+            'profit_loss': total_pnl,
+            'profit_percent': total_pnl / self.params.initial_balance * 100,
+            'total_trades': int(len(pnl)),
+            'winning_trades': int((pnl > 0).sum()),
+            'win_rate': float((pnl > 0).mean() * 100) if len(pnl) else 0.0,
+            'avg_leverage': float(self.trades['leverage'].mean()) if len(pnl) else 0.0,
+            'stop_losses': int((status == STOP_LOSS).sum()),
+            'take_profits': int((status == TAKE_PROFIT).sum()),
+            'liquidations': int((status == LIQUIDATION).sum()),
+            'ruined': self.ruined_at is not None,
+            **equity_metrics(self.equity, self.params.initial_balance, self.params.equity_step)
+        }
+
+    def trade_rows(self) -> dict:
+        """Trades en colonnes JSON (paire et statut en clair, dates ISO)"""
+        trades = self.trades
+        iso = lambda values: [datetime.fromtimestamp(t, timezone.utc).isoformat() for t in values]
+        return {
+            'pair': [self.pairs[i] for i in trades['pair']],
+            'timestamp': iso(trades['entry_time']),
+            'close_timestamp': iso(trades['exit_time']),
+            'entry_price': trades['entry_price'].tolist(),
+            'exit_price': trades['exit_price'].tolist(),
+            'leverage': trades['leverage'].tolist(),
+            'effective_size': trades['effective_size'].tolist(),
+            'margin_used': trades['margin_used'].tolist(),
+            'pnl': trades['pnl'].tolist(),
+            'status': [STATUSES[s] for s in trades['status']]
+        }
+
+    def to_report(self) -> dict:
+        iso = lambda t: datetime.fromtimestamp(t, timezone.utc).isoformat()
+        return {
+            'backtest_summary': {
+                'start_time': iso(self.start),
+                'end_time': iso(self.end),
+                'duration_hours': (self.end - self.start) / 3600,
+                'pairs': self.pairs,
+                'elapsed_seconds': self.elapsed
+            },
+            'financial_results': self.metrics(),
+            'configuration': asdict(self.params),
+            'equity_curve': {'timestamp': self.equity_time.tolist(), 'value': self.equity.tolist()},
+            'trade_history': self.trade_rows()
+        }
+
+
+def simulate(dataset: dict, params: BacktestParams, indicators: dict = None,
+             start: float = None, end: float = None) -> BacktestResult:
+    """Rejoue la stratégie sur [start, end) (ouvertures bougie par bougie, sorties au premier seuil touché)
+
+    `indicators` ({paire: Indicators} calculés sur toute la série) évite de les recalculer
+    """
+    started = time.time()
+    pairs = sorted(dataset)
+    start = min(dataset[p].time[0] for p in pairs) if start is None else start
+    end = max(dataset[p].time[-1] for p in pairs) + 1 if end is None else end
+    capital = params.initial_balance
+    position_capital = capital * params.position_fraction
+
+    # Candidats à l'ouverture (confiance et levier au-dessus des seuils), toutes paires confondues
+    bounds, cand_time, cand_pair, cand_index, cand_leverage = {}, [], [], [], []
+    for p, pair in enumerate(pairs):
+        bars = dataset[pair]
+        ind = indicators[pair] if indicators is not None else compute_indicators(bars, params)
+        first, stop = np.searchsorted(bars.time, [start, end])
+        bounds[p] = stop
+        confidence, volatility = ind.confidence[first:stop], ind.volatility[first:stop]
+        leverage = recommend_leverage(confidence, volatility, params.pair_max_leverage(pair),
+                                      params.pair_min_confidence(pair), params)
+        index = np.flatnonzero((confidence > params.entry_confidence) & (leverage > params.entry_leverage))
+        cand_time.append(bars.time[first + index])
+        cand_pair.append(np.full(len(index), p))
+        cand_index.append(first + index)
+        cand_leverage.append(leverage[index])
+    cand_time = np.concatenate(cand_time)
+    order = np.argsort(cand_time, kind='stable')
+    cand_time = cand_time[order]
+    cand_pair = np.concatenate(cand_pair)[order]
+    cand_index = np.concatenate(cand_index)[order]
+    cand_leverage = np.concatenate(cand_leverage)[order]
+
+    # Parcours chronologique des candidats; positions ouvertes dans un tas trié par date de sortie
+    open_positions = []  # (exit_time, margin, exposure, pnl)
+    used_margin = exposure = 0.0
+    realized = capital  # Capital réalisé: compte ruiné (plus aucune ouverture) dès qu'il tombe à zéro
+    ruined_at = None
+    rows = []
+    margin_limit = capital * params.max_margin_usage_pct / 100
+    k = 0
+    while k < len(cand_time):
+        t = cand_time[k]
+        while open_positions and open_positions[0][0] <= t:
+            exit_time, margin, size, pnl = heapq.heappop(open_positions)
+            used_margin -= margin
+            exposure -= size
+            realized += pnl
+            if realized <= 0 and ruined_at is None:
+                ruined_at = float(exit_time)
+        if ruined_at is not None:
+            break  # Les positions déjà ouvertes vont à leur terme
+        leverage = float(cand_leverage[k])
+        new_exposure = position_capital * leverage
+        if new_exposure > capital * params.max_position_multiple:
+            k += 1
+            continue
+        if (used_margin + position_capital > margin_limit
+                or exposure + new_exposure > capital * params.max_exposure_multiple):
+            # Capital saturé: rien ne change avant la prochaine fermeture
+            k = max(k + 1, int(np.searchsorted(cand_time, open_positions[0][0], side='left'))) if open_positions else k + 1
+            continue
+
+        p, i = int(cand_pair[k]), int(cand_index[k])
+        bars = dataset[pairs[p]]
+        entry = bars.close[i]
+        effective_size = float(int(new_exposure))
+        margin = effective_size / leverage
+        stop_loss = entry * (1 - params.stop_loss_pct / 100)
+        take_profit = entry * (1 + params.take_profit_pct / 100)
+        liquidation = position_rules.liquidation_price(entry, leverage)
+        stop_level = max(stop_loss, liquidation)
+        j = first_exit(bars, i + 1, bounds[p], stop_level, take_profit)
+        if j is None:
+            j = bounds[p] - 1
+            exit_price, status = bars.close[j], END
+        elif bars.low[j] <= stop_level:
+            # Stop prioritaire si les deux seuils sont dans la même bougie; gap: exécution à l'ouverture
+            exit_price = min(bars.open[j], stop_level)
+            status = LIQUIDATION if exit_price <= liquidation else STOP_LOSS
+        else:
+            exit_price, status = max(bars.open[j], take_profit), TAKE_PROFIT
+        if status == LIQUIDATION or exit_price <= liquidation:
+            pnl = -margin  # Perte totale de la marge
+        else:
+            pnl = effective_size * (exit_price / entry - 1)
+        exit_time = bars.time[j] if j > i else t
+        rows.append((p, i, t, exit_time, entry, exit_price, leverage, effective_size, margin, pnl, status))
+        heapq.heappush(open_positions, (exit_time, margin, effective_size, pnl))
+        used_margin += margin
+        exposure += effective_size
+        k += 1
+
+    columns = ('pair', 'entry_index', 'entry_time', 'exit_time', 'entry_price', 'exit_price',
+               'leverage', 'effective_size', 'margin_used', 'pnl', 'status')
+    table = np.array(rows, dtype=np.float64).reshape(len(rows), len(columns))
+    trades = {name: table[:, c] for c, name in enumerate(columns)}
+    for name in ('pair', 'entry_index', 'status'):
+        trades[name] = trades[name].astype(np.int64)
+
+    equity_time, equity = equity_curve(dataset, pairs, trades, params, start, min(end, max(dataset[p].time[-1] for p in pairs)))
+    return BacktestResult(params, pairs, float(start), float(end), trades, equity_time, equity,
+                          elapsed=time.time() - started, ruined_at=ruined_at)
+
+
+def equity_metrics(equity: np.ndarray, initial_balance: float, step: float) -> dict:
+    """Sharpe annualisé et drawdown max (%) d'une courbe d'équité à pas régulier
+
+    Drawdown borné à 100%: les pertes des positions encore ouvertes à la ruine peuvent
+    pousser l'équité sous zéro, mais le compte ne peut pas perdre plus que tout
+    """
+    # Taille des positions fixée sur le capital initial: rendements rapportés à ce capital
+    returns = np.diff(equity) / initial_balance
+    std = returns.std() if len(returns) else 0.0
+    sharpe = float(returns.mean() / std * np.sqrt(SECONDS_PER_YEAR / step)) if std > 0 else 0.0
+    floored = np.maximum(equity, 0.0)
+    drawdown = float(np.max(1 - floored / np.maximum.accumulate(floored)) * 100) if len(equity) else 0.0
+    return {'sharpe': sharpe, 'max_drawdown_pct': drawdown}
+
+
+def equity_curve(dataset, pairs, trades, params, start, end):
+    """Valeur du portefeuille sur une grille régulière: P&L réalisé + positions ouvertes au dernier prix"""
+    grid = np.arange(start, end + params.equity_step, params.equity_step)
+    grid = grid[grid <= max(end, start)]
+    value = np.full(len(grid), params.initial_balance, dtype=np.float64)
+
+    # Réalisé: somme des P&L des trades fermés à chaque point
+    order = np.argsort(trades['exit_time'])
+    realized = np.concatenate(([0.0], np.cumsum(trades['pnl'][order])))
+    value += realized[np.searchsorted(trades['exit_time'][order], grid, side='right')]
+
+    # Latent: chaque trade contribue aux points de grille où il est ouvert
+    for p, pair in enumerate(pairs):
+        mask = trades['pair'] == p
+        if not mask.any():
+            continue
+        bars = dataset[pair]
+        first = np.searchsorted(grid, trades['entry_time'][mask], side='left')
+        last = np.searchsorted(grid, trades['exit_time'][mask], side='left')
+        counts = np.maximum(last - first, 0)
+        if not counts.sum():
+            continue
+        owner = np.repeat(np.arange(len(counts)), counts)
+        points = first[owner] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        prices = bars.close[np.maximum(np.searchsorted(bars.time, grid[points], side='right') - 1, 0)]
+        entry = trades['entry_price'][mask][owner]
+        leverage = trades['leverage'][mask][owner]
+        unrealized = trades['effective_size'][mask][owner] * (prices / entry - 1)
+        liquidated = prices <= position_rules.liquidation_price(entry, leverage)
+        unrealized = np.where(liquidated, -trades['margin_used'][mask][owner], unrealized)
+        value += np.bincount(points, weights=unrealized, minlength=len(grid))
+    return grid, value
+
+
+def run_backtest(dataset: dict, params: BacktestParams = None, start=None, end=None) -> BacktestResult:
+    return simulate(dataset, params or BacktestParams(), start=start, end=end)
+
+
+def write_report(result: BacktestResult, directory: str = REPORTS_DIR, name: str = 'backtest_report') -> str:
+    """Rapport JSON horodaté dans reports/"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(result.to_report(), f, indent=2)
+    return path
+
+
+def parse_date(value):
+    """Date ISO ou epoch -> epoch (None si absent)"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return pd.Timestamp(value, tz='UTC').timestamp()
+
+
+def print_summary(result: BacktestResult):
+    metrics = result.metrics()
+    print(f"📈 Backtest {', '.join(result.pairs)} en {result.elapsed:.2f}s")
+    print(f"💰 Valeur finale: ${metrics['final_value']:,.2f} | P&L: ${metrics['profit_loss']:+,.2f} "
+          f"({metrics['profit_percent']:+.1f}%)")
+    print(f"📊 Trades: {metrics['total_trades']} | Réussite: {metrics['win_rate']:.1f}% | "
+          f"Levier moyen: {metrics['avg_leverage']:.1f}x")
+    print(f"🛑 Stop-loss: {metrics['stop_losses']} | 🎯 Take-profit: {metrics['take_profits']} | "
+          f"💀 Liquidations: {metrics['liquidations']}")
+    print(f"⚖️ Sharpe: {metrics['sharpe']:.2f} | Drawdown max: {metrics['max_drawdown_pct']:.1f}%")
+    if result.ruined_at is not None:
+        ruined = datetime.fromtimestamp(result.ruined_at, timezone.utc).isoformat()
+        print(f"☠️ Compte ruiné le {ruined}: plus aucune ouverture ensuite")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest de la stratégie sur des bougies OHLCV locales")
+    parser.add_argument('data', nargs='+', help="Fichiers CSV/Parquet ou dossiers (une paire par fichier)")
+    parser.add_argument('--start', help="Début (date ISO ou epoch)")
+    parser.add_argument('--end', help="Fin exclue (date ISO ou epoch)")
+    parser.add_argument('--config', help="Fichier JSON d'IntelligentLeverageConfig (sinon paramètres du moteur)")
+    parser.add_argument('--reports', default=REPORTS_DIR, help="Dossier des rapports")
+    args = parser.parse_args()
+
+    params = BacktestParams()
+    if args.config:
+        from config.intelligent_leverage_config import IntelligentLeverageConfig
+        params = BacktestParams.from_config(IntelligentLeverageConfig(args.config))
+
+    loaded = time.time()
+    dataset = load_dataset(args.data)
+    if not dataset:
+        parser.error("aucune donnée chargée")
+    print(f"📂 {sum(len(b) for b in dataset.values()):,} bougies chargées en {time.time() - loaded:.2f}s")
+    result = simulate(dataset, params, start=parse_date(args.start), end=parse_date(args.end))
+    print_summary(result)
+    print(f"📝 Rapport: {write_report(result, args.reports)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Agrégation des prix en bougies OHLCV (1m, 5m, 1h) par paire
+Tableaux NumPy préalloués: chaque prix met à jour la bougie courante ou en ouvre une, en O(1)
+"""
+
+import threading
+import time
+
+import numpy as np
+
+# unité -> durée d'une bougie en secondes
+TIMEFRAMES = {'1m': 60, '5m': 300, '1h': 3600}
+DEFAULT_CAPACITY = 500  # Bougies conservées par unité (≈8h en 1m, 20j en 1h)
+
+TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+
+class BarSeries:
+    """Bougies d'une paire pour une unité de temps, anneau de capacité fixe"""
+
+    def __init__(self, step: int, capacity: int = DEFAULT_CAPACITY):
+        self.step = step
+        self.capacity = capacity
+        self.data = np.full((capacity, len(FIELDS)), np.nan)
+        self.start = 0
+        self.size = 0
+        self.opened = 0  # Bougies ouvertes depuis la création (position absolue)
+
+    def __len__(self):
+        return self.size
+
+    def _row(self, i: int) -> int:
+        return (self.start + i) % self.capacity
+
+    def update(self, t: float, price: float, volume: float = 0.0) -> bool:
+        """Intègre un prix; renvoie True si une nouvelle bougie a été ouverte"""
+        bucket = t - t % self.step
+        if self.size:
+            bar = self.data[self._row(self.size - 1)]
+            if bucket <= bar[TIME]:
+                # Bougie courante (un prix en retard reste dans la dernière bougie)
+                bar[HIGH] = max(bar[HIGH], price)
+                bar[LOW] = min(bar[LOW], price)
+                bar[CLOSE] = price
+                bar[VOLUME] += volume
+                return False
+        self.append((bucket, price, price, price, price, volume))
+        return True
+
+    def append(self, row):
+        self.data[self._row(self.size)] = row
+        self.opened += 1
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def view(self, n: int = None) -> np.ndarray:
+        """Copie ordonnée des n dernières bougies (toutes par défaut)"""
+        n = self.size if n is None else min(n, self.size)
+        first = self.start + self.size - n
+        idx = np.arange(first, first + n) % self.capacity
+        return self.data[idx]
+
+    def last(self):
+        return self.data[self._row(self.size - 1)].copy() if self.size else None
+
+    def clear(self):
+        self.start = 0
+        self.size = 0
+        self.opened = 0
+
+
+class BarAggregator:
+    """Bougies OHLCV de chaque paire sur plusieurs unités de temps"""
+
+    def __init__(self, timeframes=None, capacity: int = DEFAULT_CAPACITY):
+        self.timeframes = dict(timeframes or TIMEFRAMES)
+        self.capacity = capacity
+        self.series = {}  # paire -> {unité: BarSeries}
+        self.generation = 0  # Incrémenté à chaque effacement/rechargement
+        self._lock = threading.Lock()  # Alimenté par le thread des prix, lu par l'analyse
+
+    def _pair_series(self, pair: str) -> dict:
+        series = self.series.get(pair)
+        if series is None:
+            series = self.series[pair] = {name: BarSeries(step, self.capacity)
+                                          for name, step in self.timeframes.items()}
+        return series
+
+    def update(self, pair: str, price: float, t: float = None, volume: float = 0.0):
+        """Intègre un prix (poll ou flux) dans toutes les unités de la paire"""
+        if price is None or not price > 0:
+            return
+        t = time.time() if t is None else t
+        with self._lock:
+            for series in self._pair_series(pair).values():
+                series.update(t, price, volume)
+
+    def update_many(self, prices: dict, t: float = None):
+        """Snapshot {paire: prix} horodaté une seule fois"""
+        t = time.time() if t is None else t
+        for pair, price in prices.items():
+            self.update(pair, price, t)
+
+    def count(self, pair: str, timeframe: str = '1m') -> int:
+        series = self.series.get(pair)
+        return len(series[timeframe]) if series else 0
+
+    def bars(self, pair: str, timeframe: str = '1m', n: int = None) -> np.ndarray:
+        """Lignes (time, open, high, low, close, volume), de la plus ancienne à la plus récente"""
+        with self._lock:
+            series = self.series.get(pair)
+            if series is None:
+                return np.empty((0, len(FIELDS)))
+            return series[timeframe].view(n)
+
+    def tail(self, pair: str, timeframe: str, since: int):
+        """(génération, bougies ouvertes, bougies à partir de la position absolue `since`)
+        
+        La dernière ligne est la bougie en cours; les plus anciennes peuvent avoir été écrasées
+        """
+        with self._lock:
+            series = self.series.get(pair)
+            if series is None:
+                return self.generation, 0, np.empty((0, len(FIELDS)))
+            series = series[timeframe]
+            return self.generation, series.opened, series.view(max(series.opened - since, 0))
+
+    def change_pct(self, pair: str, timeframe: str = '1h', periods: int = 24):
+        """Variation (%) entre l'ouverture d'il y a `periods` bougies et le dernier prix"""
+        rows = self.bars(pair, timeframe, periods)
+        if len(rows) == 0:
+            return None
+        return float((rows[-1, CLOSE] / rows[0, OPEN] - 1.0) * 100)
+
+    def clear(self):
+        with self._lock:
+            self.series.clear()
+            self.generation += 1
+
+    def to_dict(self) -> dict:
+        """État sérialisable (snapshot persistant)"""
+        with self._lock:
+            return {pair: {name: s.view().tolist() for name, s in series.items()}
+                    for pair, series in self.series.items()}
+
+    def load(self, data: dict):
+        """Restaure un état produit par to_dict (unités inconnues ignorées)"""
+        self.clear()
+        with self._lock:
+            for pair, series in data.items():
+                target = self._pair_series(pair)
+                for name, rows in series.items():
+                    if name in target:
+                        for row in rows[-self.capacity:]:
+                            target[name].append(row)
@@ -0,0 +1,76 @@
+"""
+Flux de changements numérotés pour les mises à jour incrémentales du dashboard
+"""
+
+import threading
+from collections import deque
+from itertools import islice
+
+# Types d'événements
+CRYPTO = 'crypto'        # clé: symbole, données: CryptoInfo sérialisé
+OPENED = 'opened'        # clé: id de position, données: Position sérialisée
+CLOSED = 'closed'        # clé: id de position, données: trade de l'historique
+PORTFOLIO = 'portfolio'  # données: résumé du portfolio (sans historiques)
+HISTORY = 'history'      # données: point {timestamp, value, pnl}
+RISK = 'risk'            # données: dernière simulation Monte-Carlo des positions
+
+
+class ChangeFeed:
+    """Journal borné des changements; chaque événement porte un numéro de séquence"""
+
+    def __init__(self, maxlen: int = 5000):
+        self.seq = 0
+        self.events = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def append(self, kind: str, key, data) -> int:
+        with self._lock:
+            self.seq += 1
+            self.events.append((self.seq, kind, key, data))
+            return self.seq
+
+    def reset(self):
+        """Oublie les événements: tout client existant devra se resynchroniser"""
+        with self._lock:
+            self.seq += 1
+            self.events.clear()
+
+    def since(self, seq: int):
+        """(séquence courante, événements après seq) ou (séquence, None) si seq est trop ancien"""
+        with self._lock:
+            first = self.events[0][0] if self.events else self.seq + 1
+            if seq > self.seq or seq < first - 1:
+                return self.seq, None
+            # Séquences contiguës: position directe dans le deque
+            return self.seq, list(islice(self.events, seq - first + 1, None))
+
+    def delta(self, seq: int):
+        """Changements fusionnés depuis seq (None si une resynchronisation complète est nécessaire)"""
+        current, events = self.since(seq)
+        if events is None:
+            return None
+        delta = {
+            'seq': current,
+            'reset': False,
+            'portfolio': None,
+            'cryptos': {},
+            'opened': {},
+            'closed': [],
+            'history': [],
+            'risk': None
+        }
+        for _, kind, key, data in events:
+            if kind == CRYPTO:
+                delta['cryptos'][key] = data
+            elif kind == OPENED:
+                delta['opened'][key] = data
+            elif kind == CLOSED:
+                delta['opened'].pop(key, None)  # Ouverte puis fermée dans l'intervalle
+                delta['closed'].append(data)
+            elif kind == PORTFOLIO:
+                delta['portfolio'] = data
+            elif kind == HISTORY:
+                delta['history'].append(data)
+            elif kind == RISK:
+                delta['risk'] = data
+        return delta
@@ -71,6 +71,7 @@ class StrategyConfig:
     
     # Analyse de volatilité
     volatility_window: int = 20
+    volatility_ewma_span: int = 0  # Span EWMA en bougies (0: fenêtre volatility_window)
     volatility_threshold_high: float = 10.0
     volatility_threshold_low: float = 2.0
     
@@ -153,6 +154,10 @@ class IntelligentLeverageConfig:
                     if hasattr(self.trading, key):
                         setattr(self.trading, key, value)
                 
+                for key, value in config_data.get('leverage', {}).items():
+                    if hasattr(self.leverage, key):
+                        setattr(self.leverage, key, value)
+                
                 for key, value in config_data.get('strategy', {}).items():
                     if hasattr(self.strategy, key):
                         setattr(self.strategy, key, value)
@@ -204,6 +209,7 @@ class IntelligentLeverageConfig:
                     'trend_analysis_periods': self.strategy.trend_analysis_periods,
                     'min_trend_strength': self.strategy.min_trend_strength,
                     'volatility_window': self.strategy.volatility_window,
+                    'volatility_ewma_span': self.strategy.volatility_ewma_span,
                     'volatility_threshold_high': self.strategy.volatility_threshold_high,
                     'volatility_threshold_low': self.strategy.volatility_threshold_low,
                     'base_confidence': self.strategy.base_confidence,
@@ -0,0 +1,55 @@
+"""
+Diffusion Server-Sent Events: chaque message est encodé une seule fois
+puis servi tel quel à tous les clients connectés
+"""
+
+import threading
+from collections import deque
+
+from wire_format import encode_json
+
+KEEPALIVE_SECONDS = 15.0   # Commentaire SSE envoyé si rien n'a été publié
+RETRY_MS = 3000            # Délai de reconnexion conseillé au navigateur
+
+
+class Broadcaster:
+    """Anneau de messages SSE pré-encodés + réveil des abonnés par Condition"""
+
+    def __init__(self, maxlen: int = 64, keepalive: float = KEEPALIVE_SECONDS):
+        self.messages = deque(maxlen=maxlen)  # (id, bytes), ids croissants
+        self.last_id = 0
+        self.subscribers = 0
+        self.keepalive = keepalive
+        self._cond = threading.Condition()
+
+    def publish(self, msg_id: int, event: str, data) -> bytes:
+        """Encode le message une fois et réveille tous les abonnés"""
+        message = b"id: %d\nevent: %s\ndata: %s\n\n" % (msg_id, event.encode('utf-8'), encode_json(data))
+        with self._cond:
+            self.messages.append((msg_id, message))
+            self.last_id = msg_id
+            self._cond.notify_all()
+        return message
+
+    def _pending(self, last_id: int) -> list:
+        return [message for msg_id, message in self.messages if msg_id > last_id]
+
+    def subscribe(self, last_id: int = None):
+        """Générateur de flux SSE; last_id (en-tête Last-Event-ID) rejoue les messages manqués"""
+        with self._cond:
+            self.subscribers += 1
+            if last_id is None:
+                last_id = self.last_id
+            elif last_id > self.last_id:
+                last_id = -1  # Id d'un processus précédent: rejouer tout l'anneau
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode('utf-8')
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self.last_id > last_id, self.keepalive)
+                    pending = self._pending(last_id)
+                    last_id = self.last_id
+                yield b''.join(pending) if pending else b": keepalive\n\n"
+        finally:
+            with self._cond:
+                self.subscribers -= 1
@@ -12,7 +12,9 @@ import threading
 from datetime import datetime, timedelta
 import ccxt
 import random
-import math
+from price_client import PriceSourceClient
+from bar_aggregator import BarAggregator
+from leverage_analyzer import IntelligentLeverageAnalyzer
 
 app = Flask(__name__)
 CORS(app)
@@ -52,7 +54,6 @@ for pair, config in TRADING_PAIRS.items():
         'name': config['name'],
         'icon': config['icon'],
         'price': 0.0,
-        'price_history': [],  # Pour analyser la tendance
         'price_change_24h': 0.0,
         'volatility': 0.0,  # Volatilité calculée
         'confidence_score': 50.0,  # Score de confiance du signal
@@ -88,6 +89,9 @@ for pair, config in TRADING_PAIRS.items():
         'status': 'active'
     }
 
+# Pool de connexions partagé par le feeder de prix et le gestionnaire de funding
+price_client = PriceSourceClient()
+
 class FundingRateManager:
     """Gestionnaire des taux de funding"""
     
@@ -105,13 +109,13 @@ class FundingRateManager:
     def setup_exchanges(self):
         """Configure les exchanges pour récupérer les funding rates"""
         try:
-            bitget = ccxt.bitget({'sandbox': False, 'enableRateLimit': True})
+            bitget = ccxt.bitget(price_client.exchange_config('bitget', sandbox=False))
             self.exchanges.append(('Bitget', bitget))
         except Exception as e:
             print(f"⚠️  Bitget funding: {e}")
         
         try:
-            binance = ccxt.binance({'sandbox': False, 'enableRateLimit': True})
+            binance = ccxt.binance(price_client.exchange_config('binance', sandbox=False))
             self.exchanges.append(('Binance', binance))
         except Exception as e:
             print(f"⚠️  Binance funding: {e}")
@@ -162,117 +166,6 @@ class FundingRateManager:
         return self.calculate_funding_cost(symbol, position_size_usd, 1, 24)
 
 
-class IntelligentLeverageAnalyzer:
-    """Analyseur intelligent pour déterminer le levier optimal"""
-    
-    def __init__(self):
-        self.min_history_length = 10
-    
-    def calculate_volatility(self, prices):
-        """Calcule la volatilité sur les derniers prix"""
-        if len(prices) < 2:
-            return 0.0
-        
-        returns = []
-        for i in range(1, len(prices)):
-            returns.append((prices[i] - prices[i-1]) / prices[i-1])
-        
-        if not returns:
-            return 0.0
-        
-        mean_return = sum(returns) / len(returns)
-        variance = sum((r - mean_return) ** 2 for r in returns) / len(returns)
-        return math.sqrt(variance) * 100  # En pourcentage
-    
-    def analyze_trend(self, prices):
-        """Analyse la tendance des prix"""
-        if len(prices) < 5:
-            return 'NEUTRAL', 50.0
-        
-        recent_prices = prices[-5:]
-        trend_score = 0
-        
-        # Calcul de la tendance
-        for i in range(1, len(recent_prices)):
-            if recent_prices[i] > recent_prices[i-1]:
-                trend_score += 1
-            elif recent_prices[i] < recent_prices[i-1]:
-                trend_score -= 1
-        
-        # Déterminer la direction et la force
-        if trend_score >= 3:
-            return 'STRONG_UP', 80.0
-        elif trend_score == 2:
-            return 'UP', 65.0
-        elif trend_score == -2:
-            return 'DOWN', 65.0
-        elif trend_score <= -3:
-            return 'STRONG_DOWN', 80.0
-        else:
-            return 'NEUTRAL', 50.0
-    
-    def calculate_confidence_score(self, pair, crypto_data):
-        """Calcule le score de confiance pour un signal"""
-        prices = crypto_data['price_history']
-        if len(prices) < 5:
-            return 40.0
-        
-        # Facteurs de confiance
-        trend, trend_strength = self.analyze_trend(prices)
-        volatility = crypto_data['volatility']
-        price_change_24h = abs(crypto_data['price_change_24h'])
-        
-        # Score de base selon la tendance
-        base_score = trend_strength
-        
-        # Ajustements
-        # Volatilité modérée = bon
-        if 2 <= volatility <= 5:
-            base_score += 10
-        elif volatility > 10:
-            base_score -= 15  # Trop volatile = risqué
-        
-        # Mouvement 24h significatif = bon signal
-        if 3 <= price_change_24h <= 8:
-            base_score += 15
-        elif price_change_24h > 15:
-            base_score -= 10  # Trop de mouvement = risqué
-        
-        # Bonus pour certaines cryptos plus stables
-        if pair in ['BTC/USDC', 'ETH/USDC']:
-            base_score += 5
-        
-        return max(30.0, min(95.0, base_score))
-    
-    def recommend_leverage(self, pair, crypto_data):
-        """Recommande le levier optimal"""
-        confidence = crypto_data['confidence_score']
-        max_leverage = crypto_data['max_leverage']
-        min_confidence = crypto_data['min_confidence']
-        volatility = crypto_data['volatility']
-        
-        # Pas de levier si confiance trop faible
-        if confidence < min_confidence:
-            return 1.0
-        
-        # Calcul du levier basé sur la confiance
-        confidence_ratio = (confidence - min_confidence) / (95 - min_confidence)
-        
-        # Ajustement selon la volatilité
-        volatility_factor = max(0.5, 1.0 - (volatility / 20))
-        
-        # Levier recommandé
-        recommended = 1.0 + (max_leverage - 1.0) * confidence_ratio * volatility_factor
-        
-        # Limites de sécurité
-        if volatility > 8:
-            recommended = min(recommended, 3.0)  # Max 3x si très volatile
-        
-        # Limite globale à 10x maximum
-        recommended = min(recommended, 10.0)
-        
-        return max(1.0, min(max_leverage, recommended))
-
 class MultiCryptoPriceFeeder:
     """Récupère les prix réels pour toutes les cryptos"""
     
@@ -283,14 +176,14 @@ class MultiCryptoPriceFeeder:
     def setup_exchanges(self):
         """Configure les exchanges"""
         try:
-            bitget = ccxt.bitget({'sandbox': False, 'enableRateLimit': True})
+            bitget = ccxt.bitget(price_client.exchange_config('bitget', sandbox=False))
             self.exchanges.append(('Bitget', bitget))
             print("✅ Bitget connecté")
         except Exception as e:
             print(f"⚠️  Bitget: {e}")
         
         try:
-            binance = ccxt.binance({'sandbox': False, 'enableRateLimit': True})
+            binance = ccxt.binance(price_client.exchange_config('binance', sandbox=False))
             self.exchanges.append(('Binance', binance))
             print("✅ Binance connecté")
         except Exception as e:
@@ -320,7 +213,8 @@ class MultiCryptoPriceFeeder:
 
 # Instances
 price_feeder = MultiCryptoPriceFeeder()
-leverage_analyzer = IntelligentLeverageAnalyzer()
+bars = BarAggregator()  # Bougies 1m/5m/1h par paire
+leverage_analyzer = IntelligentLeverageAnalyzer(bars)
 funding_manager = FundingRateManager()
 
 @app.route('/')
@@ -1623,15 +1517,11 @@ def update_crypto_analysis():
                         crypto_data['price_change_24h'] = change_24h
                         crypto_data['price_source'] = source
                         
-                        # Ajouter à l'historique (garder 20 derniers prix)
-                        crypto_data['price_history'].append(price)
-                        if len(crypto_data['price_history']) > 20:
-                            crypto_data['price_history'].pop(0)
+                        # Intégrer le prix dans les bougies 1m/5m/1h
+                        bars.update(pair, price)
                         
                         # Calculer volatilité
-                        crypto_data['volatility'] = leverage_analyzer.calculate_volatility(
-                            crypto_data['price_history']
-                        )
+                        crypto_data['volatility'] = leverage_analyzer.volatility(pair)
                         
                         # Calculer score de confiance
                         crypto_data['confidence_score'] = leverage_analyzer.calculate_confidence_score(
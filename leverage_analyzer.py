@@ -0,0 +1,169 @@
+"""
+Analyseur de signaux partagé par les moteurs: volatilité, tendance, confiance et levier
+Lit les bougies de BarAggregator (clôtures) au lieu d'un historique brut de prix;
+volatilité et tendance sont tenues en flux par paire (O(1) par nouvelle bougie)
+"""
+
+from config.intelligent_leverage_config import get_strategy_config
+from bar_aggregator import CLOSE
+from streaming_stats import RollingVariance, EwmaVariance, TrendCounter, sign
+
+
+class PairSignals:
+    """État des estimateurs d'une paire: bougies clôturées intégrées + bougie en cours"""
+
+    def __init__(self, periods, volatility_window, ewma_span=None):
+        self.returns = EwmaVariance(ewma_span) if ewma_span else RollingVariance(volatility_window)
+        self.trend = TrendCounter(periods)
+        self.generation = None
+        self.consumed = 0         # Position absolue de la bougie en cours
+        self.closes = 0           # Clôtures définitives intégrées
+        self.last_close = None    # Dernière clôture définitive
+        self.current = None       # Clôture provisoire de la bougie en cours
+
+    def push(self, close):
+        if self.last_close is not None:
+            self.returns.push((close - self.last_close) / self.last_close)
+            self.trend.push(sign(close - self.last_close))
+        self.last_close = close
+        self.closes += 1
+
+    def provisional(self):
+        """(rendement, variation) de la bougie en cours par rapport à la dernière clôture"""
+        if self.current is None or self.last_close is None:
+            return None, None
+        return (self.current - self.last_close) / self.last_close, sign(self.current - self.last_close)
+
+    def prices(self):
+        return self.closes + (self.current is not None)
+
+
+class IntelligentLeverageAnalyzer:
+    """Analyseur intelligent pour déterminer le levier optimal"""
+
+    def __init__(self, bars=None, strategy=None, timeframe: str = '1m', ewma_span: int = None):
+        strategy = strategy or get_strategy_config()
+        self.bars = bars
+        self.timeframe = timeframe  # Unité des bougies lues par l'analyse
+        self.trend_periods = sorted(strategy.trend_analysis_periods)
+        self.volatility_window = strategy.volatility_window
+        # Volatilité EWMA au lieu de la fenêtre glissante (0: fenêtre glissante)
+        self.ewma_span = strategy.volatility_ewma_span if ewma_span is None else ewma_span
+        self.min_history_length = strategy.min_price_history_length
+        self.signals = {}  # paire -> PairSignals
+
+    def _signals(self, pair):
+        """Estimateurs de la paire, mis à jour avec les bougies apparues depuis le dernier appel"""
+        state = self.signals.get(pair)
+        if state is None:
+            state = self.signals[pair] = PairSignals(self.trend_periods, self.volatility_window, self.ewma_span)
+        if self.bars is None:
+            return state
+        generation, opened, rows = self.bars.tail(pair, self.timeframe, state.consumed)
+        if generation != state.generation:
+            # Bougies effacées ou rechargées: on repart de tout l'historique disponible
+            state = self.signals[pair] = PairSignals(self.trend_periods, self.volatility_window, self.ewma_span)
+            state.generation = generation
+            generation, opened, rows = self.bars.tail(pair, self.timeframe, 0)
+        if len(rows):
+            for close in rows[:-1, CLOSE]:
+                state.push(float(close))
+            state.current = float(rows[-1, CLOSE])
+            state.consumed = opened - 1
+        return state
+
+    def is_ready(self, pair):
+        """Assez de bougies pour un signal significatif"""
+        return self.bars is not None and self.bars.count(pair, self.timeframe) >= self.min_history_length
+
+    def volatility(self, pair):
+        """Volatilité des rendements sur volatility_window bougies (ou EWMA si ewma_span), en flux"""
+        state = self._signals(pair)
+        extra, _ = state.provisional()
+        if len(state.returns) == 0 and extra is None:
+            return 0.0
+        return state.returns.std(extra) * 100  # En pourcentage
+
+    @staticmethod
+    def classify_trend(trend_score, period):
+        """Direction et force (mêmes seuils que sur 5 prix: 3/4 et 2/4 des variations)"""
+        ratio = trend_score / (period - 1)
+        if ratio >= 0.75:
+            return 'STRONG_UP', 80.0
+        elif ratio >= 0.5:
+            return 'UP', 65.0
+        elif ratio <= -0.75:
+            return 'STRONG_DOWN', 80.0
+        elif ratio <= -0.5:
+            return 'DOWN', 65.0
+        else:
+            return 'NEUTRAL', 50.0
+
+    def trends(self, pair):
+        """Direction et force sur chaque période de trend_analysis_periods couverte, via les compteurs en flux"""
+        state = self._signals(pair)
+        _, extra = state.provisional()
+        return {period: self.classify_trend(state.trend.score(period, extra)[0], period)
+                for period in self.trend_periods if state.prices() >= period}
+
+    def calculate_confidence_score(self, pair, crypto_data):
+        """Calcule le score de confiance pour un signal"""
+        trends = self.trends(pair)
+        if not trends:
+            return 40.0
+
+        # Facteurs de confiance
+        trend_strength = sum(strength for _, strength in trends.values()) / len(trends)
+        volatility = crypto_data['volatility']
+        price_change_24h = abs(crypto_data['price_change_24h'])
+
+        # Score de base selon la tendance (moyenne des périodes disponibles)
+        base_score = trend_strength
+
+        # Ajustements
+        # Volatilité modérée = bon
+        if 2 <= volatility <= 5:
+            base_score += 10
+        elif volatility > 10:
+            base_score -= 15  # Trop volatile = risqué
+
+        # Mouvement 24h significatif = bon signal
+        if 3 <= price_change_24h <= 8:
+            base_score += 15
+        elif price_change_24h > 15:
+            base_score -= 10  # Trop de mouvement = risqué
+
+        # Bonus pour certaines cryptos plus stables
+        if pair in ['BTC/USDC', 'ETH/USDC']:
+            base_score += 5
+
+        return max(30.0, min(95.0, base_score))
+
+    def recommend_leverage(self, pair, crypto_data):
+        """Recommande le levier optimal"""
+        confidence = crypto_data['confidence_score']
+        max_leverage = crypto_data['max_leverage']
+        min_confidence = crypto_data['min_confidence']
+        volatility = crypto_data['volatility']
+
+        # Pas de levier si confiance trop faible
+        if confidence < min_confidence:
+            return 1.0
+
+        # Calcul du levier basé sur la confiance
+        confidence_ratio = (confidence - min_confidence) / (95 - min_confidence)
+
+        # Ajustement selon la volatilité
+        volatility_factor = max(0.5, 1.0 - (volatility / 20))
+
+        # Levier recommandé
+        recommended = 1.0 + (max_leverage - 1.0) * confidence_ratio * volatility_factor
+
+        # Limites de sécurité
+        if volatility > 8:
+            recommended = min(recommended, 3.0)  # Max 3x si très volatile
+
+        # Limite globale à 10x maximum
+        recommended = min(recommended, 10.0)
+
+        return max(1.0, min(max_leverage, recommended))
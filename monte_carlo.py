@@ -0,0 +1,144 @@
+"""
+Simulation Monte-Carlo du risque des positions ouvertes
+Trajectoires de prix corrélées (Cholesky) tirées par lots sous un budget mémoire fixe:
+probabilité de toucher stop-loss, take-profit ou liquidation avant l'horizon
+"""
+
+import numpy as np
+
+from bar_aggregator import TIME, CLOSE
+
+LOOKBACK = 240     # Bougies utilisées pour la volatilité et les corrélations (4h en 1m)
+MIN_RETURNS = 30   # En dessous, la paire n'est pas simulée
+OUTCOMES = ('stop_loss', 'take_profit', 'liquidation', 'open')
+
+
+def step_returns(rows: np.ndarray, step: float) -> dict:
+    """{horodatage: rendement log ramené à un pas} (bougies manquantes: écart plus long)"""
+    times = rows[1:, TIME]
+    gaps = np.maximum(np.diff(rows[:, TIME]) / step, 1.0)
+    returns = np.diff(np.log(rows[:, CLOSE])) / np.sqrt(gaps)
+    return dict(zip(times.tolist(), returns.tolist()))
+
+
+def cholesky_factor(covariance: np.ndarray) -> np.ndarray:
+    """Facteur de Cholesky; repli sur les écarts-types seuls si la matrice est dégénérée"""
+    jitter = np.eye(len(covariance)) * 1e-14
+    try:
+        return np.linalg.cholesky(covariance + jitter)
+    except np.linalg.LinAlgError:
+        return np.diag(np.sqrt(np.maximum(np.diag(covariance), 0.0)))
+
+
+class MarketModel:
+    """Covariance des rendements log par pas de bougie pour un ensemble de paires"""
+
+    def __init__(self, pairs, covariance: np.ndarray, step: float):
+        self.pairs = list(pairs)
+        self.index = {pair: i for i, pair in enumerate(self.pairs)}
+        self.covariance = covariance
+        self.step = step
+
+    @classmethod
+    def from_bars(cls, bars, pairs, timeframe: str = '1m', lookback: int = LOOKBACK):
+        """Volatilités par paire, corrélations sur les bougies communes (None si historique insuffisant)"""
+        step = bars.timeframes[timeframe]
+        returns = {}
+        for pair in sorted(pairs):
+            rows = bars.bars(pair, timeframe, lookback + 1)
+            if len(rows) > MIN_RETURNS:
+                returns[pair] = step_returns(rows, step)
+        if not returns:
+            return None
+
+        names = list(returns)
+        std = np.array([np.std(list(returns[pair].values())) for pair in names])
+        correlation = np.eye(len(names))
+        common = sorted(set.intersection(*(set(r) for r in returns.values())))
+        if len(names) > 1 and len(common) >= MIN_RETURNS:
+            matrix = np.array([[returns[pair][t] for pair in names] for t in common])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                estimated = np.corrcoef(matrix, rowvar=False)
+            correlation = np.where(np.isfinite(estimated), estimated, correlation)
+        return cls(names, correlation * np.outer(std, std), step)
+
+
+def simulate(model: MarketModel, positions, prices: dict, horizon: float, n_paths: int = 20000,
+             memory_mb: float = 64, rng: np.random.Generator = None) -> dict:
+    """Probabilités par position et risque global sur `n_paths` trajectoires jusqu'à l'horizon (secondes)
+
+    `positions`: itérable de (id, position) exposant pair, entry_price, effective_size, margin_used,
+    stop_loss_price, take_profit_price et liquidation_price; `prices`: {paire: prix actuel}
+    """
+    rng = rng or np.random.default_rng()
+    positions = [(pos_id, position) for pos_id, position in positions
+                 if model is not None and position.pair in model.index and prices.get(position.pair)]
+    result = {'horizon': horizon, 'paths': n_paths, 'positions': {},
+              'portfolio': {'any_liquidation': 0.0, 'expected_pnl': 0.0, 'pnl_p5': 0.0}}
+    if not positions:
+        return result
+
+    # Seules les paires portant des positions sont tirées
+    pairs = sorted({position.pair for _, position in positions})
+    columns = {pair: i for i, pair in enumerate(pairs)}
+    idx = [model.index[pair] for pair in pairs]
+    covariance = model.covariance[np.ix_(idx, idx)]
+    factor = cholesky_factor(covariance).T
+    drift = -0.5 * np.diag(covariance)  # Prix martingale: E[exp(rendement)] = 1
+    steps = max(1, int(round(horizon / model.step)))
+
+    # Lot borné par le budget: normales + trajectoires (float64) + masques de franchissement
+    bytes_per_path = steps * (len(pairs) * 8 * 2 + 2)
+    batch = int(max(1, min(n_paths, memory_mb * 1024 * 1024 // bytes_per_path)))
+
+    levels = []
+    for pos_id, position in positions:
+        price = prices[position.pair]
+        levels.append((
+            columns[position.pair], price,
+            np.log(max(position.stop_loss_price, position.liquidation_price) / price),
+            np.log(position.take_profit_price / price),
+            position.liquidation_price, position.entry_price,
+            position.effective_size, position.margin_used
+        ))
+    counts = np.zeros((len(positions), len(OUTCOMES)))
+    portfolio_pnl = np.empty(n_paths)
+    any_liquidation = np.zeros(n_paths, dtype=bool)
+
+    done = 0
+    while done < n_paths:
+        size = min(batch, n_paths - done)
+        paths = rng.standard_normal((size, steps, len(pairs))) @ factor
+        paths += drift
+        np.cumsum(paths, axis=1, out=paths)
+        rows = np.arange(size)
+        pnl = np.zeros(size)
+        for j, (column, price, stop_log, take_log, liquidation, entry, effective_size, margin) in enumerate(levels):
+            log_path = paths[:, :, column]
+            down = log_path <= stop_log
+            up = log_path >= take_log
+            first_down = np.where(down.any(axis=1), down.argmax(axis=1), steps)
+            first_up = np.where(up.any(axis=1), up.argmax(axis=1), steps)
+            stopped = (first_down < steps) & (first_down <= first_up)  # Stop prioritaire, comme le moteur
+            taken = (first_up < steps) & ~stopped
+            exit_step = np.where(stopped, first_down, np.where(taken, first_up, steps - 1))
+            exit_price = price * np.exp(log_path[rows, exit_step])
+            liquidated = stopped & (exit_price <= liquidation)
+            position_pnl = np.where(liquidated, -margin, effective_size * (exit_price / entry - 1))
+
+            counts[j] += (stopped.sum() - liquidated.sum(), taken.sum(), liquidated.sum(),
+                          size - stopped.sum() - taken.sum())
+            pnl += position_pnl
+            any_liquidation[done:done + size] |= liquidated
+        portfolio_pnl[done:done + size] = pnl
+        done += size
+
+    probabilities = counts / n_paths
+    for j, (pos_id, _) in enumerate(positions):
+        result['positions'][pos_id] = dict(zip(OUTCOMES, probabilities[j].tolist()))
+    result['portfolio'] = {
+        'any_liquidation': float(any_liquidation.mean()),
+        'expected_pnl': float(portfolio_pnl.mean()),
+        'pnl_p5': float(np.percentile(portfolio_pnl, 5))  # P&L dépassé dans 95% des trajectoires
+    }
+    return result
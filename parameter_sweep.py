@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Balayage des paramètres d'IntelligentLeverageConfig (grille ou tirage aléatoire)
+réparti sur un pool de processus; chaque processus projette les bougies .npy en mémoire
+une seule fois et ne reçoit que les jeux de paramètres à évaluer
+"""
+
+import argparse
+import copy
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import backtest
+from backtest import BacktestParams
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bars_npy')
+DEFAULT_CONFIG = os.path.join('config', 'intelligent_leverage_config.json')
+RESULT_METRICS = ('sharpe', 'max_drawdown_pct', 'liquidations', 'profit_loss', 'total_trades', 'win_rate', 'ruined')
+
+# État des processus du pool (initialisé par init_worker)
+_worker = {}
+
+
+def apply_overrides(config, overrides: dict):
+    """Applique {'section.champ[.clé]': valeur} à un IntelligentLeverageConfig
+
+    Un champ dictionnaire (ex. 'leverage.crypto_max_leverage') reçoit la valeur pour toutes
+    ses clés; 'leverage.crypto_max_leverage.BTC/USDC' ne modifie qu'une paire
+    """
+    for path, value in overrides.items():
+        section_name, _, rest = path.partition('.')
+        name, _, key = rest.partition('.')
+        section = getattr(config, section_name, None)
+        if section is None or not hasattr(section, name):
+            raise ValueError(f"Paramètre inconnu: {path}")
+        current = getattr(section, name)
+        if isinstance(current, dict):
+            # Copie sur l'instance: les dictionnaires de LeverageConfig sont des attributs de classe
+            updated = dict(current)
+            if key:
+                updated[key] = value
+            elif isinstance(value, dict):
+                updated.update(value)
+            else:
+                updated = {k: value for k in current}
+            setattr(section, name, updated)
+        elif key:
+            raise ValueError(f"{section_name}.{name} n'est pas un dictionnaire: {path}")
+        else:
+            setattr(section, name, value)
+    return config
+
+
+def grid_combinations(space: dict) -> list:
+    """Produit cartésien {champ: [valeurs]} -> [{champ: valeur}]"""
+    names = list(space)
+    values = [space[name] if isinstance(space[name], list) else [space[name]] for name in names]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def random_combinations(space: dict, count: int, seed: int = None) -> list:
+    """Tirages aléatoires: liste -> choix, {'min', 'max'} -> uniforme (entier si bornes entières)"""
+    rng = random.Random(seed)
+    combos = []
+    for _ in range(count):
+        combo = {}
+        for name, values in space.items():
+            if isinstance(values, dict):
+                low, high = values['min'], values['max']
+                if isinstance(low, int) and isinstance(high, int):
+                    combo[name] = rng.randint(low, high)
+                else:
+                    combo[name] = round(rng.uniform(low, high), 4)
+            elif isinstance(values, list):
+                combo[name] = rng.choice(values)
+            else:
+                combo[name] = values
+        combos.append(combo)
+    return combos
+
+
+def init_worker(paths, config_file, start, end):
+    """Chargé une fois par processus: bougies projetées en mémoire + configuration de base"""
+    from config.intelligent_leverage_config import IntelligentLeverageConfig
+    _worker['dataset'] = backtest.load_dataset(paths)
+    _worker['config'] = IntelligentLeverageConfig(config_file)
+    _worker['window'] = (start, end)
+    _worker['indicators'] = {}  # clé des paramètres d'indicateurs -> {paire: Indicators}
+
+
+def worker_indicators(params: BacktestParams) -> dict:
+    key = params.indicator_key()
+    cache = _worker['indicators']
+    if key not in cache:
+        cache[key] = {pair: backtest.compute_indicators(bars, params)
+                      for pair, bars in _worker['dataset'].items()}
+    return cache[key]
+
+
+def evaluate(overrides: dict) -> dict:
+    """Backtest d'un jeu de paramètres (exécuté dans un processus du pool)"""
+    config = apply_overrides(copy.deepcopy(_worker['config']), overrides)
+    params = BacktestParams.from_config(config)
+    start, end = _worker['window']
+    result = backtest.simulate(_worker['dataset'], params, worker_indicators(params), start, end)
+    metrics = result.metrics()
+    return dict(overrides=overrides, **{name: metrics[name] for name in RESULT_METRICS})
+
+
+def prepare_data(paths, cache_dir: str) -> list:
+    """Fichiers .npy à projeter en mémoire (conversion unique des CSV/Parquet)"""
+    if all(path.endswith('.npy') for path in paths):
+        return list(paths)
+    started = time.time()
+    saved = backtest.save_dataset_npy(backtest.load_dataset(paths), cache_dir)
+    print(f"📦 Bougies converties en .npy ({cache_dir}) en {time.time() - started:.2f}s")
+    return saved
+
+
+def run_sweep(paths, combos, config_file=DEFAULT_CONFIG, workers=None, start=None, end=None) -> list:
+    """Évalue chaque combinaison sur le pool; résultats triés par Sharpe décroissant, comptes ruinés en dernier"""
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(combos) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(paths, config_file, start, end)) as pool:
+        results = list(pool.map(evaluate, combos, chunksize=chunksize))
+    return sorted(results, key=lambda r: (not r['ruined'], r['sharpe']), reverse=True)
+
+
+def write_report(results, summary: dict, directory: str = backtest.REPORTS_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"parameter_sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump({'sweep_summary': summary, 'results': results}, f, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Balayage des paramètres de levier sur un pool de processus")
+    parser.add_argument('data', nargs='+', help="Fichiers/dossiers de bougies (CSV, Parquet ou .npy)")
+    parser.add_argument('--space', required=True,
+                        help="JSON {'section.champ': [valeurs] ou {'min', 'max'}}, ex. 'leverage.volatility_reduction_factor'")
+    parser.add_argument('--random', type=int, help="Nombre de tirages aléatoires (sinon grille complète)")
+    parser.add_argument('--seed', type=int, help="Graine des tirages aléatoires")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Processus du pool")
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help="Configuration de base")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_DIR, help="Dossier des .npy projetés en mémoire")
+    parser.add_argument('--start', help="Début (date ISO ou epoch)")
+    parser.add_argument('--end', help="Fin exclue (date ISO ou epoch)")
+    parser.add_argument('--top', type=int, default=10, help="Meilleurs résultats affichés")
+    parser.add_argument('--reports', default=backtest.REPORTS_DIR, help="Dossier des rapports")
+    args = parser.parse_args()
+
+    with open(args.space) as f:
+        space = json.load(f)
+    combos = random_combinations(space, args.random, args.seed) if args.random else grid_combinations(space)
+    # Validation avant de lancer le pool (champ inconnu = erreur immédiate)
+    from config.intelligent_leverage_config import IntelligentLeverageConfig
+    base = IntelligentLeverageConfig(args.config)
+    for combo in combos[:1]:
+        apply_overrides(copy.deepcopy(base), combo)
+
+    paths = prepare_data(args.data, args.cache)
+    started = time.time()
+    print(f"🔬 {len(combos)} combinaisons sur {args.workers} processus")
+    results = run_sweep(paths, combos, args.config, args.workers,
+                        backtest.parse_date(args.start), backtest.parse_date(args.end))
+    elapsed = time.time() - started
+
+    print(f"✅ Balayage terminé en {elapsed:.1f}s ({elapsed / max(len(combos), 1):.2f}s par combinaison)")
+    for result in results[:args.top]:
+        print(f"⚖️ Sharpe {result['sharpe']:+.2f} | Drawdown {result['max_drawdown_pct']:.1f}% | "
+              f"💀 {result['liquidations']} | P&L ${result['profit_loss']:+,.2f} | {result['overrides']}")
+    summary = {
+        'data': args.data, 'config': args.config, 'space': space, 'combinations': len(combos),
+        'mode': 'random' if args.random else 'grid', 'seed': args.seed, 'workers': args.workers,
+        'start': args.start, 'end': args.end, 'elapsed_seconds': elapsed
+    }
+    print(f"📝 Rapport: {write_report(results, summary, args.reports)}")
+
+
+if __name__ == "__main__":
+    main()
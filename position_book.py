@@ -0,0 +1,87 @@
+"""
+Carnet des positions actives indexé par id et par paire
+"""
+
+from collections.abc import MutableMapping
+
+from trigger_index import TriggerIndex
+from position_store import PositionStore
+
+
+class PositionBook(MutableMapping):
+    """Positions actives: accès O(1) par id, par paire, et totaux de marge/exposition"""
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_pair = {}
+        self.margin_used = 0.0     # Capital réel engagé (effective_size / leverage)
+        self.total_exposure = 0.0  # Exposition totale avec levier
+        self.triggers = TriggerIndex()  # Seuils SL/TP/liquidation triés par paire
+        self.store = PositionStore()    # Colonnes NumPy pour les agrégats (P&L, exposition)
+
+    def __getitem__(self, pos_id):
+        return self._by_id[pos_id]
+
+    def __setitem__(self, pos_id, position):
+        if pos_id in self._by_id:
+            del self[pos_id]
+        self._by_id[pos_id] = position
+        self._by_pair.setdefault(position.pair, {})[pos_id] = position
+        self.margin_used += position.effective_size / position.leverage
+        self.total_exposure += position.effective_size
+        self.triggers.add(pos_id, position)
+        self.store.add(pos_id, position)
+
+    def __delitem__(self, pos_id):
+        position = self._by_id.pop(pos_id)
+        pair_positions = self._by_pair[position.pair]
+        del pair_positions[pos_id]
+        if not pair_positions:
+            del self._by_pair[position.pair]
+        self.triggers.remove(pos_id)
+        self.store.remove(pos_id)
+
+        if self._by_id:
+            self.margin_used -= position.effective_size / position.leverage
+            self.total_exposure -= position.effective_size
+        else:
+            # Carnet vide: remise à zéro exacte (pas de dérive flottante)
+            self.margin_used = 0.0
+            self.total_exposure = 0.0
+
+    def __iter__(self):
+        return iter(self._by_id)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, pos_id):
+        return pos_id in self._by_id
+
+    def clear(self):
+        self._by_id.clear()
+        self._by_pair.clear()
+        self.triggers.clear()
+        self.store.clear()
+        self.margin_used = 0.0
+        self.total_exposure = 0.0
+
+    def snapshot(self) -> list:
+        """Copie [(id, position)] lisible depuis un autre thread (copie atomique sous le GIL)"""
+        return list(self._by_id.items())
+
+    def for_pair(self, pair) -> dict:
+        """Positions d'une paire ({id: position}), sans parcourir tout le carnet"""
+        return self._by_pair.get(pair, {})
+
+    def crossed(self, pair, price):
+        """Positions d'une paire dont un seuil de fermeture est franchi"""
+        return {pos_id: self._by_id[pos_id] for pos_id in self.triggers.crossed(pair, price)}
+
+    def evaluate(self, pair_prices: dict):
+        """P&L vectorisé de toutes les positions (agrégats du portfolio et par paire)"""
+        return self.store.evaluate(pair_prices)
+
+    def by_pair(self):
+        """Itère sur (paire, {id: position}) pour les paires ayant des positions"""
+        return self._by_pair.items()
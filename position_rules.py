@@ -0,0 +1,30 @@
+"""
+Règles de risque des positions LONG avec levier
+Seuils partagés par Position, le carnet de positions et les simulations
+"""
+
+STOP_LOSS_PCT = 1.5             # % de mouvement de prix défavorable
+TAKE_PROFIT_PCT = 2.5           # % de mouvement de prix favorable
+LIQUIDATION_MARGIN_LOSS = 0.9   # Liquidation à 90% de perte de marge
+MARGIN_CALL_MARGIN_LOSS = 0.7   # Alerte margin call à 70% de perte de marge
+RISKY_PRICE_RATIO = 0.95        # Position "RISQUÉ" sous 95% du prix d'entrée
+
+
+def liquidation_price(entry_price: float, leverage: float) -> float:
+    """Prix de liquidation: entry_price * (1 - 0.9/leverage)"""
+    return entry_price * (1 - LIQUIDATION_MARGIN_LOSS / leverage)
+
+
+def margin_call_price(entry_price: float, leverage: float) -> float:
+    """Prix d'alerte margin call: entry_price * (1 - 0.7/leverage)"""
+    return entry_price * (1 - MARGIN_CALL_MARGIN_LOSS / leverage)
+
+
+def stop_loss_price(entry_price: float) -> float:
+    """Prix de stop-loss (perte de 1.5% sur l'exposition)"""
+    return entry_price * (1 - STOP_LOSS_PCT / 100)
+
+
+def take_profit_price(entry_price: float) -> float:
+    """Prix de take-profit (gain de 2.5% sur l'exposition)"""
+    return entry_price * (1 + TAKE_PROFIT_PCT / 100)
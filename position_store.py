@@ -0,0 +1,136 @@
+"""
+Colonnes NumPy des positions actives pour les agrégats du portfolio et par paire
+P&L de toutes les positions en une passe vectorisée; la fermeture des positions passe
+par TriggerIndex et Position.should_close (voir PositionBook)
+"""
+
+import numpy as np
+
+import position_rules
+
+NUMERIC_COLUMNS = ('entry_price', 'leverage', 'effective_size', 'margin')
+
+
+class PositionEvaluation:
+    """Résultat d'une évaluation vectorisée (une valeur par slot occupé)"""
+
+    def __init__(self, store, slots, prices, pnl):
+        self.store = store
+        self.slots = slots
+        self.prices = prices
+        self.pnl = pnl
+
+    def totals(self) -> dict:
+        """Agrégats globaux: nb, nb avec levier, levier max, marge, exposition, P&L"""
+        store = self.store
+        leverage = store.leverage[self.slots]
+        return {
+            'count': int(len(self.slots)),
+            'leveraged': int(np.count_nonzero(leverage > 1.0)),
+            'max_leverage': float(leverage.max()) if len(leverage) else 1.0,
+            'margin_used': float(store.margin[self.slots].sum()),
+            'exposure': float(store.effective_size[self.slots].sum()),
+            'pnl': float(np.nan_to_num(self.pnl).sum())
+        }
+
+    def by_pair(self) -> dict:
+        """{paire: (nb positions, exposition, P&L)} agrégés avec np.bincount"""
+        store = self.store
+        pair_idx = store.pair_idx[self.slots]
+        n_pairs = len(store.pairs)
+        counts = np.bincount(pair_idx, minlength=n_pairs)
+        exposure = np.bincount(pair_idx, weights=store.effective_size[self.slots], minlength=n_pairs)
+        pnl = np.bincount(pair_idx, weights=np.nan_to_num(self.pnl), minlength=n_pairs)
+        return {pair: (int(counts[i]), float(exposure[i]), float(pnl[i]))
+                for i, pair in enumerate(store.pairs) if counts[i]}
+
+
+class PositionStore:
+    """Colonnes préallouées (capacité doublée à la demande) + slots libres réutilisés"""
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        for column in NUMERIC_COLUMNS:
+            setattr(self, column, np.zeros(capacity, dtype=np.float64))
+        self.pair_idx = np.zeros(capacity, dtype=np.int32)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.pairs = []        # index -> paire
+        self.pair_index = {}   # paire -> index
+        self.slot_of = {}      # pos_id -> slot
+        self.free_slots = []
+        self.size = 0          # plus haut slot utilisé + 1
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def __contains__(self, pos_id):
+        return pos_id in self.slot_of
+
+    def _grow(self):
+        new_capacity = self.capacity * 2
+        for column in NUMERIC_COLUMNS + ('pair_idx', 'active'):
+            old = getattr(self, column)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:self.capacity] = old
+            setattr(self, column, new)
+        self.capacity = new_capacity
+
+    def _pair_id(self, pair) -> int:
+        idx = self.pair_index.get(pair)
+        if idx is None:
+            idx = self.pair_index[pair] = len(self.pairs)
+            self.pairs.append(pair)
+        return idx
+
+    def add(self, pos_id, position):
+        """Ajoute une position (objet avec les champs de Position)"""
+        if pos_id in self.slot_of:
+            self.remove(pos_id)
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            if self.size == self.capacity:
+                self._grow()
+            slot = self.size
+            self.size += 1
+
+        self.entry_price[slot] = position.entry_price
+        self.leverage[slot] = position.leverage
+        self.effective_size[slot] = position.effective_size
+        self.margin[slot] = position.effective_size / position.leverage
+        self.pair_idx[slot] = self._pair_id(position.pair)
+        self.active[slot] = True
+        self.slot_of[pos_id] = slot
+        return slot
+
+    def remove(self, pos_id):
+        slot = self.slot_of.pop(pos_id)
+        self.active[slot] = False
+        self.free_slots.append(slot)
+
+    def clear(self):
+        self.active[:] = False
+        self.slot_of.clear()
+        self.free_slots.clear()
+        self.size = 0
+
+    def evaluate(self, pair_prices: dict) -> PositionEvaluation:
+        """P&L de toutes les positions en une passe"""
+        slots = np.flatnonzero(self.active[:self.size])
+
+        # Prix courant par position (NaN si la paire n'a pas de prix)
+        price_table = np.full(max(len(self.pairs), 1), np.nan)
+        for pair, price in pair_prices.items():
+            idx = self.pair_index.get(pair)
+            if idx is not None and price:
+                price_table[idx] = price
+        prices = price_table[self.pair_idx[slots]]
+
+        entry = self.entry_price[slots]
+        leverage = self.leverage[slots]
+        margin = self.margin[slots]
+        liquidated = prices <= position_rules.liquidation_price(entry, leverage)
+
+        # Même formule que Position.calculate_pnl
+        pnl = np.where(liquidated, -margin, margin * (prices - entry) / entry * leverage)
+        return PositionEvaluation(self, slots, prices, pnl)
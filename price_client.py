@@ -0,0 +1,81 @@
+"""
+Client HTTP partagé pour les sources de prix et de funding
+Connexions persistantes (keep-alive) avec un pool par hôte
+"""
+
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class PriceSourceClient:
+    """Pool de sessions HTTP réutilisables (CoinGecko, Binance, ccxt...)"""
+
+    def __init__(self, pool_size: int = None, timeout: float = None,
+                 retries: int = None, backoff_factor: float = None):
+        self.pool_size = pool_size or int(os.environ.get('HTTP_POOL_SIZE', 4))
+        self.timeout = timeout or float(os.environ.get('HTTP_TIMEOUT', 8))
+        self.retries = retries if retries is not None else int(os.environ.get('HTTP_RETRIES', 2))
+        self.backoff_factor = backoff_factor if backoff_factor is not None else float(os.environ.get('HTTP_BACKOFF', 0.5))
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def _build_retry(self) -> Retry:
+        """Politique de retry : erreurs réseau, 429 et 5xx avec backoff exponentiel"""
+        return Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            backoff_factor=self.backoff_factor,
+            respect_retry_after_header=False,  # Ne pas bloquer le cycle sur un Retry-After long
+            raise_on_status=False              # Rendre la dernière réponse (ex: 429) à l'appelant
+        )
+
+    def _build_session(self) -> requests.Session:
+        """Crée une session avec un pool de connexions keep-alive"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=self._build_retry()
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def session(self, key: str) -> requests.Session:
+        """Session persistante associée à un hôte ou à un exchange"""
+        with self._lock:
+            if key not in self.sessions:
+                self.sessions[key] = self._build_session()
+            return self.sessions[key]
+
+    def get(self, url: str, params: dict = None, headers: dict = None, timeout: float = None):
+        """GET via la session de l'hôte (connexion réutilisée entre les cycles)"""
+        host = urlsplit(url).netloc
+        return self.session(host).get(url, params=params, headers=headers,
+                                      timeout=timeout or self.timeout)
+
+    def exchange_config(self, exchange_id: str, **options) -> dict:
+        """Paramètres ccxt partageant le pool de connexions de l'exchange"""
+        config = {
+            'session': self.session(exchange_id),
+            'timeout': int(self.timeout * 1000),  # ccxt attend des millisecondes
+            'enableRateLimit': True
+        }
+        config.update(options)
+        return config
+
+    def close(self):
+        """Ferme toutes les connexions ouvertes"""
+        with self._lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
@@ -0,0 +1,146 @@
+"""
+Sources de prix interchangeables du moteur d'analyse
+- live: CoinGecko/Binance (fonction de collecte du bot), enregistrable en JSON Lines
+- replay: ticks enregistrés rejoués au rythme réel (ou accéléré) ou aussi vite que possible,
+  pour des runs reproductibles et des benchmarks hors ligne
+"""
+
+import csv
+import json
+import time
+from datetime import datetime
+
+
+class ReplayFinished(Exception):
+    """Plus aucun tick à rejouer"""
+
+
+class PriceSource:
+    """Interface: snapshot {symbole: prix} par cycle d'analyse et horloge associée"""
+
+    def next_prices(self, pairs) -> dict:
+        raise NotImplementedError
+
+    def now(self) -> float:
+        """Horodatage (epoch) du dernier snapshot: horloge de marché des positions"""
+        return time.time()
+
+    def pause(self, interval: float):
+        """Attente entre deux cycles d'analyse"""
+        time.sleep(interval)
+
+
+class LivePriceSource(PriceSource):
+    """Prix temps réel via la fonction de collecte fournie (fetch(pairs) -> {symbole: prix})"""
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+
+    def next_prices(self, pairs) -> dict:
+        return self.fetch(pairs)
+
+
+class RecordingPriceSource(PriceSource):
+    """Enregistre chaque snapshot d'une autre source, rejouable par ReplayPriceSource"""
+
+    def __init__(self, source: PriceSource, path: str):
+        self.source = source
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def next_prices(self, pairs) -> dict:
+        prices = self.source.next_prices(pairs)
+        self.file.write(json.dumps({'t': self.source.now(), 'prices': prices}) + '\n')
+        self.file.flush()
+        return prices
+
+    def now(self) -> float:
+        return self.source.now()
+
+    def pause(self, interval: float):
+        self.source.pause(interval)
+
+    def close(self):
+        self.file.close()
+
+
+def parse_time(value) -> float:
+    """Epoch (s ou ms) ou date ISO -> epoch en secondes"""
+    try:
+        seconds = float(value)
+    except ValueError:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    return seconds / 1000 if seconds > 1e11 else seconds
+
+
+def read_ticks(path: str):
+    """Ticks (t, {symbole: prix}) d'un fichier, lus au fil de l'eau
+
+    JSON Lines: {"t": ..., "prices": {"BTC": ...}} (format de RecordingPriceSource)
+    CSV: colonnes timestamp, symbol, price; les lignes consécutives de même horodatage forment un tick
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if not path.endswith('.csv'):
+            for line in f:
+                if line.strip():
+                    tick = json.loads(line)
+                    yield parse_time(tick['t']), {symbol: float(price) for symbol, price in tick['prices'].items()}
+            return
+        current, prices = None, {}
+        for row in csv.DictReader(f):
+            t = parse_time(row['timestamp'])
+            if prices and t != current:
+                yield current, prices
+                prices = {}
+            current = t
+            prices[row['symbol'].split('/')[0]] = float(row['price'])
+        if prices:
+            yield current, prices
+
+
+class ReplayPriceSource(PriceSource):
+    """Rejoue un tick par cycle d'analyse; `speed` 1 = temps réel, 10 = 10x, 0 = sans attente
+
+    Chaque tick est transmis à `on_prices(prices, t)` (bougies horodatées par l'enregistrement)
+    """
+
+    def __init__(self, path: str, speed: float = 0.0, on_prices=None):
+        self.path = path
+        self.speed = speed
+        self.on_prices = on_prices
+        self.ticks = read_ticks(path)
+        self.pending = next(self.ticks, None)  # Prochain tick (lu d'avance pour l'horloge)
+        self.count = 0          # Ticks rejoués
+        self.current = self.pending[0] if self.pending else None  # Horloge: dernier tick, ou le premier à venir
+        self.started = None     # (horloge murale, horodatage) du premier tick
+
+    def next_prices(self, pairs) -> dict:
+        if self.pending is None:
+            raise ReplayFinished(self.path)
+        t, prices = self.pending
+        self.pending = next(self.ticks, None)
+        if self.started is None:
+            self.started = (time.monotonic(), t)
+        elif self.speed > 0:
+            # Même espacement que l'enregistrement, divisé par la vitesse
+            wall_start, replay_start = self.started
+            delay = wall_start + (t - replay_start) / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.current = t
+        self.count += 1
+        symbols = {pair.split('/')[0] for pair in pairs}
+        prices = {symbol: price for symbol, price in prices.items() if symbol in symbols}
+        if self.on_prices:
+            self.on_prices(prices, t)
+        return prices
+
+    def now(self) -> float:
+        return self.current if self.current is not None else time.time()
+
+    def pause(self, interval: float):
+        """Le rythme est donné par les horodatages des ticks (voir next_prices)"""
+
+    def elapsed(self) -> float:
+        """Secondes murales depuis le premier tick"""
+        return time.monotonic() - self.started[0] if self.started else 0.0
@@ -0,0 +1,294 @@
+let portfolioChart;
+let currentDashboardData = null;
+let lastSeq = -1;  // Séquence du dernier delta appliqué (-1 = snapshot complet)
+let chartRange = 'hour';  // Plage affichée: 'hour', 'day' ou 'week'
+const HOUR_MS = 3600 * 1000;
+
+// Initialisation du graphique
+function initPortfolioChart() {
+    const ctx = document.getElementById('portfolioChart').getContext('2d');
+    portfolioChart = new Chart(ctx, {
+        type: 'line',
+        data: {
+            labels: [],
+            datasets: [{
+                label: 'Valeur du Portefeuille ($)',
+                data: [],
+                borderColor: '#3b82f6',
+                backgroundColor: 'rgba(59, 130, 246, 0.1)',
+                fill: true,
+                tension: 0.4
+            }, {
+                label: 'P&L Cumulé ($)',
+                data: [],
+                borderColor: '#10b981',
+                backgroundColor: 'rgba(16, 185, 129, 0.1)',
+                fill: false,
+                yAxisID: 'y1'
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            scales: {
+                y: {
+                    beginAtZero: false,
+                    position: 'left',
+                    title: { display: true, text: 'Valeur ($)' }
+                },
+                y1: {
+                    type: 'linear',
+                    display: true,
+                    position: 'right',
+                    title: { display: true, text: 'P&L ($)' },
+                    grid: { drawOnChartArea: false }
+                }
+            },
+            plugins: {
+                legend: { position: 'top' }
+            }
+        }
+    });
+}
+
+// Applique un delta (ou un snapshot complet) à l'état local
+function applyDelta(delta) {
+    lastSeq = delta.seq;
+    if (delta.reset) {
+        currentDashboardData = delta.snapshot;
+        // Le dashboard n'affiche pas les positions
+        delete currentDashboardData.active_positions;
+        return true;
+    }
+
+    const data = currentDashboardData;
+    if (delta.portfolio) Object.assign(data.portfolio, delta.portfolio);
+    Object.assign(data.cryptos, delta.cryptos);
+    delta.history.forEach(point => {
+        data.portfolio.value_history.push({timestamp: point.timestamp, value: point.value});
+        data.portfolio.pnl_history.push({timestamp: point.timestamp, pnl: point.pnl});
+    });
+    if (delta.history.length > 0) {
+        // Même fenêtre que le serveur: points bruts de la dernière heure
+        const last = new Date(delta.history[delta.history.length - 1].timestamp);
+        const keep = item => last - new Date(item.timestamp) <= HOUR_MS;
+        data.portfolio.value_history = data.portfolio.value_history.filter(keep);
+        data.portfolio.pnl_history = data.portfolio.pnl_history.filter(keep);
+        if (chartRange !== 'hour') loadChartRange();
+    }
+    return Boolean(delta.portfolio) || Object.keys(delta.cryptos).length > 0 || delta.history.length > 0;
+}
+
+// Mise à jour des données (seulement ce qui a changé depuis lastSeq)
+function updateAllData() {
+    console.log('🔄 Récupération des données...');
+    fetch('/api/intelligent-crypto/delta?since=' + lastSeq)
+        .then(response => {
+            console.log('📡 Réponse API reçue:', response.status);
+            return response.json();
+        })
+        .then(delta => {
+            console.log('📊 Delta reçu:', delta);
+            if (applyDelta(delta)) renderDashboard();
+        })
+        .catch(error => {
+            console.error('❌ Erreur:', error);
+        });
+}
+
+function renderDashboard() {
+    const data = currentDashboardData;
+
+    updatePortfolioSummary(data.portfolio, data.cryptos);
+    if (chartRange === 'hour') {
+        updatePortfolioChart(data.portfolio.value_history, data.portfolio.pnl_history);
+    }
+    updateCryptosGrid(data.cryptos);
+
+    document.getElementById('last-update').textContent = 
+        new Date(data.portfolio.last_update).toLocaleString();
+
+    console.log('✅ Mise à jour terminée');
+}
+
+// Deltas poussés par le serveur (SSE); resynchronisation si un delta manque
+function connectStream() {
+    const source = new EventSource('/api/stream');
+    source.addEventListener('delta', event => {
+        const delta = JSON.parse(event.data);
+        if (delta.seq <= lastSeq) return;
+        if (delta.reset || delta.since !== lastSeq || !currentDashboardData) {
+            updateAllData();
+        } else if (applyDelta(delta)) {
+            renderDashboard();
+        }
+    });
+    source.onerror = () => console.warn('⚠️ Flux SSE interrompu, reconnexion...');
+}
+
+function updatePortfolioSummary(portfolio, cryptos) {
+    document.getElementById('total-value').textContent = 
+        '$' + portfolio.total_value.toLocaleString(undefined, {maximumFractionDigits: 0});
+
+    const pnlElement = document.getElementById('total-pnl');
+    const pnlValue = portfolio.pnl;
+    pnlElement.textContent = (pnlValue >= 0 ? '+' : '') + '$' + pnlValue.toFixed(0);
+    pnlElement.className = 'summary-value ' + (pnlValue >= 0 ? 'positive' : 'negative');
+
+    document.getElementById('total-trades').textContent = portfolio.trades_count;
+    document.getElementById('leveraged-trades').textContent = portfolio.leveraged_trades;
+    document.getElementById('max-leverage').textContent = portfolio.max_leverage.toFixed(1) + 'x';
+    document.getElementById('margin-used').textContent = '$' + portfolio.margin_used.toLocaleString(undefined, {maximumFractionDigits: 0});
+}
+
+// Plage du graphique: 'hour' (état local) ou 'day'/'week' (niveaux sous-échantillonnés du serveur)
+function setChartRange(range, button) {
+    button.parentElement.querySelectorAll('.range-btn').forEach(btn => btn.classList.remove('active'));
+    button.classList.add('active');
+    chartRange = range;
+    if (range === 'hour') {
+        if (currentDashboardData) {
+            updatePortfolioChart(currentDashboardData.portfolio.value_history, currentDashboardData.portfolio.pnl_history);
+        }
+    } else {
+        loadChartRange();
+    }
+}
+
+function loadChartRange() {
+    const range = chartRange;
+    fetch('/api/portfolio/history?range=' + range)
+        .then(response => response.json())
+        .then(series => {
+            if (series.error || range !== chartRange) return;
+            // Tableaux parallèles (timestamps epoch en secondes)
+            const valueHistory = series.timestamp.map((t, i) => ({timestamp: t * 1000, value: series.value[i]}));
+            const pnlHistory = series.timestamp.map((t, i) => ({timestamp: t * 1000, pnl: series.pnl[i]}));
+            updatePortfolioChart(valueHistory, pnlHistory);
+        })
+        .catch(error => {
+            console.error('❌ Erreur:', error);
+        });
+}
+
+function updatePortfolioChart(valueHistory, pnlHistory) {
+    if (!portfolioChart) return;
+
+    const format = chartRange === 'week'
+        ? {weekday: 'short', hour: '2-digit', minute: '2-digit'}
+        : {hour: '2-digit', minute: '2-digit'};
+    const labels = valueHistory.map(item => 
+        new Date(item.timestamp).toLocaleTimeString('fr-FR', format)
+    );
+    const values = valueHistory.map(item => item.value);
+    const pnls = pnlHistory.map(item => item.pnl);
+
+    portfolioChart.data.labels = labels;
+    portfolioChart.data.datasets[0].data = values;
+    portfolioChart.data.datasets[1].data = pnls;
+    portfolioChart.update();
+}
+
+function updateCryptosGrid(cryptos) {
+    console.log('🪙 Mise à jour des cryptos:', cryptos);
+    const grid = document.getElementById('cryptos-grid');
+    grid.innerHTML = '';
+
+    if (!cryptos || Object.keys(cryptos).length === 0) {
+        grid.innerHTML = '<div style="grid-column: 1/-1; text-align: center; padding: 40px; color: #666;">Aucune donnée crypto disponible</div>';
+        return;
+    }
+
+    Object.values(cryptos).forEach(crypto => {
+        const card = createCryptoCard(crypto);
+        grid.appendChild(card);
+    });
+}
+
+function createCryptoCard(crypto) {
+    const card = document.createElement('div');
+    card.className = 'crypto-card';
+
+    const changeClass = crypto.price_change_24h >= 0 ? 'positive' : 'negative';
+    const pnlColor = crypto.profit_loss >= 0 ? '#22c55e' : '#ef4444';
+
+    let confidenceClass = 'confidence-low';
+    if (crypto.confidence_score >= 75) confidenceClass = 'confidence-high';
+    else if (crypto.confidence_score >= 60) confidenceClass = 'confidence-medium';
+
+    const leverageColor = crypto.current_leverage > 1 ? '#f59e0b' : '#64748b';
+
+    card.innerHTML = `
+        <div class="crypto-header">
+            <div class="crypto-name">
+                <span class="crypto-icon">${crypto.icon}</span>
+                <div>
+                    <div class="crypto-title">${crypto.name}</div>
+                    <div style="font-size: 0.9em; color: #64748b;">${crypto.symbol}</div>
+                </div>
+            </div>
+            <div style="text-align: right;">
+                <div class="price">$${crypto.price.toLocaleString(undefined, {minimumFractionDigits: 2})}</div>
+                <span class="price-change ${changeClass}">
+                    ${crypto.price_change_24h >= 0 ? '+' : ''}${crypto.price_change_24h.toFixed(2)}%
+                </span>
+            </div>
+        </div>
+
+        <div class="leverage-section">
+            <div class="leverage-indicator">
+                <span>🎯 Confiance:</span>
+                <span style="font-weight: bold; color: ${confidenceClass === 'confidence-high' ? '#22c55e' : confidenceClass === 'confidence-medium' ? '#f59e0b' : '#ef4444'}">
+                    ${crypto.confidence_score.toFixed(1)}%
+                </span>
+            </div>
+            <div class="confidence-bar">
+                <div class="confidence-fill ${confidenceClass}" style="width: ${crypto.confidence_score}%"></div>
+            </div>
+
+            <div class="leverage-indicator">
+                <span>⚡ Levier Rec:</span>
+                <span class="leverage-value">${crypto.recommended_leverage.toFixed(1)}x</span>
+            </div>
+            <div class="leverage-indicator">
+                <span>🚀 Utilisé:</span>
+                <span style="font-weight: bold; color: ${leverageColor}">${crypto.current_leverage.toFixed(1)}x</span>
+            </div>
+
+            <div style="margin-top: 8px; font-size: 0.85em; color: #64748b;">
+                📊 Vol: ${crypto.volatility.toFixed(1)}% • 💰 Fund: ${crypto.funding_rate >= 0 ? '+' : ''}${crypto.funding_rate.toFixed(3)}%/8h
+            </div>
+        </div>
+
+        <div class="stats">
+            <div class="stat">
+                <div class="stat-value">$${crypto.portfolio_value.toLocaleString(undefined, {maximumFractionDigits: 0})}</div>
+                <div class="stat-label">💰 Valeur</div>
+            </div>
+            <div class="stat">
+                <div class="stat-value" style="color: ${pnlColor}">
+                    ${crypto.profit_loss >= 0 ? '+' : ''}$${crypto.profit_loss.toLocaleString(undefined, {maximumFractionDigits: 0})}
+                </div>
+                <div class="stat-label">📈 P&L</div>
+            </div>
+            <div class="stat">
+                <div class="stat-value">${crypto.total_trades}</div>
+                <div class="stat-label">💱 Trades</div>
+            </div>
+        </div>
+    `;
+
+    return card;
+}
+
+// Initialisation
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('🚀 Initialisation du dashboard...');
+    initPortfolioChart();
+    updateAllData();
+    if (window.EventSource) {
+        connectStream();
+    } else {
+        setInterval(updateAllData, 20000); // Navigateur sans SSE: actualisation toutes les 20 secondes
+    }
+});
@@ -0,0 +1,383 @@
+let currentFilters = {
+    status: 'all',
+    pair: 'all', 
+    pnl: 'all',
+    leverage: 'all',
+    sort: 'timestamp'
+};
+let tradesData = null;
+let closedTrades = [];     // Pages de /api/trades déjà chargées
+let closedCursor = null;   // Curseur de la page suivante (null = fin)
+let closedStats = null;    // Compteurs serveur des trades fermés
+let closedRequest = 0;     // Ignore les réponses d'une requête remplacée
+let lastSeq = -1;  // Séquence du dernier delta appliqué (-1 = snapshot complet)
+
+// Applique un delta (ou un snapshot complet) à l'état local
+function applyDelta(delta) {
+    lastSeq = delta.seq;
+    if (delta.reset) {
+        tradesData = delta.snapshot;  // Historique fermé paginé via /api/trades
+        loadClosedTrades(true);
+        return true;
+    }
+
+    const data = tradesData;
+    if (delta.portfolio) Object.assign(data.portfolio, delta.portfolio);
+    Object.assign(data.cryptos, delta.cryptos);
+    // Fermetures d'abord: un id réutilisé ensuite reste ouvert
+    delta.closed.forEach(trade => delete data.active_positions[trade.id]);
+    Object.assign(data.active_positions, delta.opened);
+    if (delta.risk) data.position_risk = delta.risk;  // Simulation remplacée en bloc
+    if (delta.closed.length > 0) loadClosedTrades(true);
+    return Boolean(delta.portfolio) || Boolean(delta.risk) || Object.keys(delta.cryptos).length > 0 ||
+        Object.keys(delta.opened).length > 0 || delta.closed.length > 0;
+}
+
+function updateTradesData() {
+    console.log('🔄 Récupération des données trades...');
+    fetch('/api/intelligent-crypto/delta?since=' + lastSeq)
+        .then(response => response.json())
+        .then(delta => {
+            if (applyDelta(delta)) renderTrades();
+        })
+        .catch(error => {
+            console.error('❌ Erreur:', error);
+        });
+}
+
+// Historique fermé: page suivante (ou première page si reset) selon les filtres
+function loadClosedTrades(reset) {
+    const params = new URLSearchParams({sort: currentFilters.sort, limit: 50});
+    if (currentFilters.pair !== 'all') params.set('pair', currentFilters.pair);
+    if (currentFilters.pnl === 'positive') params.set('pnl_min', 0);
+    if (currentFilters.pnl === 'negative') params.set('pnl_max', 0);
+    if (currentFilters.leverage === '1') params.set('leverage_max', 1);
+    if (currentFilters.leverage === '2-5') { params.set('leverage_min', 2); params.set('leverage_max', 5); }
+    if (currentFilters.leverage === '5+') params.set('leverage_min', 5);
+    const ranges = {'pnl-min': 'pnl_min', 'pnl-max': 'pnl_max', 'leverage-min': 'leverage_min', 'leverage-max': 'leverage_max'};
+    Object.entries(ranges).forEach(([inputId, param]) => {
+        const value = document.getElementById(inputId).value;
+        if (value) params.set(param, value);
+    });
+    if (!reset) {
+        if (closedCursor === null) return;
+        params.set('cursor', closedCursor);
+    }
+
+    const request = ++closedRequest;
+    fetch('/api/trades?' + params)
+        .then(response => response.json())
+        .then(page => {
+            if (request !== closedRequest || page.error) return;
+            closedTrades = reset ? page.trades : closedTrades.concat(page.trades);
+            closedCursor = page.next_cursor;
+            closedStats = page.stats;
+            if (tradesData) renderTrades();
+        })
+        .catch(error => {
+            console.error('❌ Erreur:', error);
+        });
+}
+
+function renderTrades() {
+    const data = tradesData;
+    updateTradesStats(data);
+    updateTradesDisplay(data);
+    document.getElementById('last-update').textContent = 
+        new Date(data.portfolio.last_update).toLocaleString();
+}
+
+// Deltas poussés par le serveur (SSE); resynchronisation si un delta manque
+function connectStream() {
+    const source = new EventSource('/api/stream');
+    source.addEventListener('delta', event => {
+        const delta = JSON.parse(event.data);
+        if (delta.seq <= lastSeq) return;
+        if (delta.reset || delta.since !== lastSeq || !tradesData) {
+            updateTradesData();
+        } else if (applyDelta(delta)) {
+            renderTrades();
+        }
+    });
+    source.onerror = () => console.warn('⚠️ Flux SSE interrompu, reconnexion...');
+}
+
+function applyFilter(filterType, value, button) {
+    // Mettre à jour les boutons actifs
+    const buttons = button.parentElement.querySelectorAll('.filter-btn');
+    buttons.forEach(btn => btn.classList.remove('active'));
+    button.classList.add('active');
+
+    // Mettre à jour les filtres
+    currentFilters[filterType] = value;
+
+    // Recharger l'historique filtré côté serveur
+    loadClosedTrades(true);
+}
+
+function applyRangeFilter() {
+    loadClosedTrades(true);
+}
+
+function filterTrade(trade) {
+    // Filtre par statut
+    if (currentFilters.status !== 'all') {
+        const isOpen = trade.status === 'OUVERT';
+        if (currentFilters.status === 'open' && !isOpen) return false;
+        if (currentFilters.status === 'closed' && isOpen) return false;
+    }
+
+    // Filtre par paire
+    if (currentFilters.pair !== 'all') {
+        const symbol = trade.pair.split('/')[0];
+        if (symbol !== currentFilters.pair) return false;
+    }
+
+    // Filtre par P&L
+    const pnl = trade.pnl || 0;
+    if (currentFilters.pnl !== 'all') {
+        if (currentFilters.pnl === 'positive' && pnl <= 0) return false;
+        if (currentFilters.pnl === 'negative' && pnl >= 0) return false;
+    }
+
+    // Filtre par plage P&L personnalisée
+    const pnlMin = document.getElementById('pnl-min').value;
+    const pnlMax = document.getElementById('pnl-max').value;
+    if (pnlMin && pnl < parseFloat(pnlMin)) return false;
+    if (pnlMax && pnl > parseFloat(pnlMax)) return false;
+
+    // Filtre par levier
+    const leverage = trade.leverage || 1;
+    if (currentFilters.leverage !== 'all') {
+        if (currentFilters.leverage === '1' && leverage > 1) return false;
+        if (currentFilters.leverage === '2-5' && (leverage < 2 || leverage > 5)) return false;
+        if (currentFilters.leverage === '5+' && leverage <= 5) return false;
+    }
+
+    // Filtre par plage levier personnalisée
+    const leverageMin = document.getElementById('leverage-min').value;
+    const leverageMax = document.getElementById('leverage-max').value;
+    if (leverageMin && leverage < parseFloat(leverageMin)) return false;
+    if (leverageMax && leverage > parseFloat(leverageMax)) return false;
+
+    return true;
+}
+
+function updateTradesStats(data) {
+    // Compteurs des trades fermés calculés côté serveur
+    const stats = closedStats || {count: 0, realized_pnl: 0, win_rate: 0};
+    const activeTrades = Object.keys(data.active_positions || {}).length;
+    const totalPnL = stats.realized_pnl;
+    const successRate = stats.win_rate;
+
+    document.getElementById('total-trades-count').textContent = stats.count + activeTrades;
+    document.getElementById('active-trades-count').textContent = activeTrades;
+
+    const pnlElement = document.getElementById('total-pnl-trades');
+    pnlElement.textContent = (totalPnL >= 0 ? '+' : '') + '$' + totalPnL.toFixed(2);
+    pnlElement.className = 'stat-value ' + (totalPnL >= 0 ? 'positive' : 'negative');
+
+    document.getElementById('success-rate').textContent = successRate.toFixed(1) + '%';
+}
+
+function updateTradesDisplay(data) {
+    const tradesList = document.getElementById('trades-list');
+
+    // Positions ouvertes (état local) puis historique fermé (déjà trié par le serveur)
+    const openTrades = [];
+    const risk = data.position_risk || {};
+    Object.values(data.active_positions || {}).forEach(pos => {
+        // Calculer le P&L en temps réel
+        const symbol = pos.pair.split('/')[0]; // ETH, BTC, SOL, XRP
+        const currentPrice = data.cryptos[symbol] ? data.cryptos[symbol].price : pos.entry_price;
+        const realTimePnL = (currentPrice - pos.entry_price) * pos.amount;
+
+        openTrades.push({
+            id: pos.id,
+            pair: pos.pair,
+            amount: pos.amount,
+            price: pos.entry_price,
+            current_price: currentPrice,
+            leverage: pos.leverage,
+            effective_size: pos.effective_size,
+            pnl: realTimePnL,
+            status: 'OUVERT',
+            type: pos.leverage > 1 ? 'LEVIER' : 'SPOT',
+            timestamp: pos.timestamp,
+            confidence: pos.confidence,
+            risk: (risk.positions || {})[pos.id],  // Probabilités Monte-Carlo (absentes sans historique)
+            risk_horizon: risk.horizon
+        });
+    });
+
+    document.getElementById('load-more').style.display = closedCursor !== null ? 'inline-block' : 'none';
+    if (openTrades.length === 0 && closedTrades.length === 0) {
+        tradesList.innerHTML = '<div class="no-trades">📭 Aucun trade disponible</div>';
+        return;
+    }
+
+    // Trier les positions ouvertes comme l'historique
+    if (currentFilters.sort === 'pnl') {
+        openTrades.sort((a, b) => b.pnl - a.pnl);
+    } else {
+        openTrades.sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp));
+    }
+
+    // Appliquer les filtres (l'historique est déjà filtré par le serveur, bornes incluses)
+    const closed = currentFilters.status === 'open' ? [] : closedTrades;
+    const filteredTrades = openTrades.concat(closed).filter(filterTrade);
+
+    if (filteredTrades.length === 0) {
+        tradesList.innerHTML = '<div class="no-trades">🔍 Aucun trade ne correspond aux filtres sélectionnés</div>';
+        return;
+    }
+
+    tradesList.innerHTML = filteredTrades.map(trade => createTradeCard(trade)).join('');
+}
+
+function createTradeCard(trade) {
+    const isOpen = trade.status === 'OUVERT';
+    const pnl = trade.pnl || 0;
+    const leverageDisplay = trade.leverage > 1 ? trade.leverage.toFixed(1) + 'x' : 'Spot';
+    const pnlClass = pnl >= 0 ? 'positive' : 'negative';
+
+    // Calculer le P&L en pourcentage avec protections
+    const effectiveSize = trade.effective_size || (trade.amount * trade.price * trade.leverage) || 0;
+    const marginUsed = effectiveSize > 0 && trade.leverage > 0 ? effectiveSize / trade.leverage : 0;
+    const pnlPercentage = marginUsed > 0 && !isNaN(pnl) ? (pnl / marginUsed) * 100 : 0;
+
+    // S'assurer que toutes les valeurs numériques sont valides
+    const safeEffectiveSize = isNaN(effectiveSize) ? 0 : effectiveSize;
+    const safePnl = isNaN(pnl) ? 0 : pnl;
+    const safePnlPercentage = isNaN(pnlPercentage) ? 0 : pnlPercentage;
+    const safeAmount = isNaN(trade.amount) ? 0 : trade.amount;
+    const safePrice = isNaN(trade.price) ? 0 : trade.price;
+    const safeCurrentPrice = isNaN(trade.current_price) ? 0 : trade.current_price;
+
+    // Calculer prix de liquidation et margin call (pour positions ouvertes avec levier)
+    let liquidationPrice = 0;
+    let marginCallPrice = 0;
+    let stopLossPrice = 0;
+    let takeProfitPrice = 0;
+    let riskLevel = 'SÛRE';
+    let riskEmoji = '✅';
+
+    if (isOpen && trade.leverage > 1 && trade.price && trade.current_price) {
+        // Prix de liquidation = prix_entrée * (1 - 0.9/levier)
+        liquidationPrice = safePrice * (1 - 0.9 / trade.leverage);
+        // Prix margin call = prix_entrée * (1 - 0.7/levier)  
+        marginCallPrice = safePrice * (1 - 0.7 / trade.leverage);
+        // Stop-Loss à -1.5% sur l'exposition (mouvement de prix défavorable)
+        stopLossPrice = safePrice * (1 - 0.015);
+        // Take-Profit à +2.5% sur l'exposition (mouvement de prix favorable)
+        takeProfitPrice = safePrice * (1 + 0.025);
+
+        // Déterminer niveau de risque
+        if (safeCurrentPrice <= liquidationPrice) {
+            riskLevel = 'LIQUIDÉ';
+            riskEmoji = '💀';
+        } else if (safeCurrentPrice <= marginCallPrice) {
+            riskLevel = 'DANGER';
+            riskEmoji = '🚨';
+        } else if (safeCurrentPrice <= safePrice * 0.95) {
+            riskLevel = 'RISQUÉ';
+            riskEmoji = '⚠️';
+        }
+    }
+
+    const openTime = new Date(trade.timestamp);
+    const timeStr = openTime.toLocaleString();
+
+    return `
+        <div class="trade-item" data-status="${trade.status}" data-type="${trade.type}">
+            <div class="trade-header">
+                <div class="trade-pair">${trade.pair} ${riskEmoji}</div>
+                <div class="trade-status ${isOpen ? 'ouvert' : 'ferme'}">${trade.status === 'LIQUIDÉ' ? '💀 LIQUIDÉ' : trade.status}</div>
+            </div>
+            <div class="trade-details">
+                <div class="trade-detail">
+                    <div class="trade-detail-label">💰 Prix d'Entrée</div>
+                    <div class="trade-detail-value">$${safePrice.toLocaleString(undefined, {minimumFractionDigits: 2})}</div>
+                </div>
+                ${isOpen && trade.current_price ? `
+                <div class="trade-detail">
+                    <div class="trade-detail-label">📊 Prix Actuel</div>
+                    <div class="trade-detail-value">$${safeCurrentPrice.toLocaleString(undefined, {minimumFractionDigits: 2})}</div>
+                </div>
+                ` : ''}
+                ${isOpen && trade.leverage > 1 && liquidationPrice > 0 ? `
+                <div class="trade-detail">
+                    <div class="trade-detail-label">🛑 Stop-Loss</div>
+                    <div class="trade-detail-value negative">$${stopLossPrice && stopLossPrice > 0 ? stopLossPrice.toLocaleString(undefined, {minimumFractionDigits: 2}) : 'N/A'}</div>
+                </div>
+                <div class="trade-detail">
+                    <div class="trade-detail-label">🎯 Take-Profit</div>
+                    <div class="trade-detail-value positive">$${takeProfitPrice && takeProfitPrice > 0 ? takeProfitPrice.toLocaleString(undefined, {minimumFractionDigits: 2}) : 'N/A'}</div>
+                </div>
+                <div class="trade-detail">
+                    <div class="trade-detail-label">💀 Prix Liquidation</div>
+                    <div class="trade-detail-value negative">$${liquidationPrice && liquidationPrice > 0 ? liquidationPrice.toLocaleString(undefined, {minimumFractionDigits: 2}) : 'N/A'}</div>
+                </div>
+                <div class="trade-detail">
+                    <div class="trade-detail-label">🚨 Niveau Risque</div>
+                    <div class="trade-detail-value ${riskLevel === 'SÛRE' ? 'positive' : 'negative'}">${riskLevel}</div>
+                </div>
+                ` : ''}
+                ${isOpen && trade.risk ? `
+                <div class="trade-detail">
+                    <div class="trade-detail-label">🎲 Probabilités (${Math.round(trade.risk_horizon / 60)} min)</div>
+                    <div class="trade-detail-value">
+                        <span class="negative">🛑 ${(trade.risk.stop_loss * 100).toFixed(1)}%</span> ·
+                        <span class="positive">🎯 ${(trade.risk.take_profit * 100).toFixed(1)}%</span> ·
+                        <span class="negative">💀 ${(trade.risk.liquidation * 100).toFixed(1)}%</span>
+                    </div>
+                </div>
+                ` : ''}
+                <div class="trade-detail">
+                    <div class="trade-detail-label">📊 Quantité</div>
+                    <div class="trade-detail-value">${safeAmount.toFixed(4)}</div>
+                </div>
+                <div class="trade-detail">
+                    <div class="trade-detail-label">⚡ Levier</div>
+                    <div class="trade-detail-value leverage">${leverageDisplay}</div>
+                </div>
+                <div class="trade-detail">
+                    <div class="trade-detail-label">💵 Taille Effective</div>
+                    <div class="trade-detail-value">$${safeEffectiveSize.toLocaleString(undefined, {maximumFractionDigits: 0})}</div>
+                </div>
+                <div class="trade-detail">
+                    <div class="trade-detail-label">📈 P&L ($)</div>
+                    <div class="trade-detail-value ${pnlClass}">
+                        ${safePnl >= 0 ? '+' : ''}$${safePnl.toFixed(2)}
+                    </div>
+                </div>
+                <div class="trade-detail">
+                    <div class="trade-detail-label">📊 P&L (%)</div>
+                    <div class="trade-detail-value ${pnlClass}">
+                        ${safePnlPercentage >= 0 ? '+' : ''}${safePnlPercentage.toFixed(2)}%
+                    </div>
+                </div>
+                <div class="trade-detail">
+                    <div class="trade-detail-label">🕒 ${isOpen ? 'Ouvert à' : 'Fermé à'}</div>
+                    <div class="trade-detail-value">${timeStr}</div>
+                </div>
+                ${trade.confidence ? `
+                <div class="trade-detail">
+                    <div class="trade-detail-label">🎯 Confiance</div>
+                    <div class="trade-detail-value">${trade.confidence.toFixed(1)}%</div>
+                </div>
+                ` : ''}
+            </div>
+        </div>
+    `;
+}
+
+// Initialisation
+document.addEventListener('DOMContentLoaded', function() {
+    updateTradesData();
+    if (window.EventSource) {
+        connectStream();
+    } else {
+        setInterval(updateTradesData, 30000); // Navigateur sans SSE: actualisation toutes les 30 secondes
+    }
+});
@@ -0,0 +1,59 @@
+"""
+Pages HTML et assets statiques: chargés une fois au démarrage,
+servis pré-compressés avec ETag et URL à empreinte
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass
+
+TEXT_TYPES = ('text/', 'application/javascript', 'application/json')
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    """Contenu immuable + version gzip calculée une seule fois"""
+    body: bytes
+    gzipped: bytes
+    etag: str
+    content_type: str
+
+    @classmethod
+    def from_bytes(cls, body: bytes, content_type: str) -> 'StaticAsset':
+        digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+        return cls(body, gzip.compress(body, compresslevel=9, mtime=0), digest, content_type)
+
+
+def guess_content_type(name: str) -> str:
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if content_type.startswith(TEXT_TYPES):
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+class AssetBundle:
+    """Fichiers d'un dossier exposés sous /<prefix>/<nom>.<empreinte>.<ext>"""
+
+    def __init__(self, folder: str, url_prefix: str = '/assets'):
+        self.url_prefix = url_prefix
+        self.hashed_names = {}  # nom -> nom à empreinte
+        self.assets = {}        # nom à empreinte -> StaticAsset
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as f:
+                asset = StaticAsset.from_bytes(f.read(), guess_content_type(name))
+            stem, ext = os.path.splitext(name)
+            hashed = f"{stem}.{asset.etag}{ext}"
+            self.hashed_names[name] = hashed
+            self.assets[hashed] = asset
+
+    def url(self, name: str) -> str:
+        """URL versionnée d'un asset (change quand son contenu change)"""
+        return f"{self.url_prefix}/{self.hashed_names[name]}"
+
+    def get(self, hashed_name: str):
+        return self.assets.get(hashed_name)
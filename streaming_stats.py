@@ -0,0 +1,149 @@
+"""
+Estimateurs en flux, O(1) par nouveau point quelle que soit la fenêtre:
+variance glissante (Welford avec retrait), variance EWMA et compteur de tendance
+Chaque estimateur accepte un point provisoire (bougie en cours) sans modifier son état
+"""
+
+import math
+
+import numpy as np
+
+
+class RollingVariance:
+    """Moyenne/variance (population) des `window` derniers points, algorithme de Welford"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = np.zeros(window)
+        self.pos = 0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def __len__(self):
+        return self.n
+
+    @staticmethod
+    def _add(n, mean, m2, x):
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        return n, mean, m2 + delta * (x - mean)
+
+    @staticmethod
+    def _remove(n, mean, m2, x):
+        if n <= 1:
+            return 0, 0.0, 0.0
+        n -= 1
+        delta = x - mean
+        mean -= delta / n
+        return n, mean, max(m2 - delta * (x - mean), 0.0)
+
+    def push(self, x: float):
+        state = (self.n, self.mean, self.m2)
+        if self.n == self.window:
+            state = self._remove(*state, self.values[self.pos])
+        self.n, self.mean, self.m2 = self._add(*state, x)
+        self.values[self.pos] = x
+        self.pos = (self.pos + 1) % self.window
+
+    def variance(self, extra: float = None) -> float:
+        """Variance de la fenêtre, ou de celle qu'on obtiendrait en ajoutant `extra`"""
+        n, mean, m2 = self.n, self.mean, self.m2
+        if extra is not None:
+            if n == self.window:
+                n, mean, m2 = self._remove(n, mean, m2, self.values[self.pos])
+            n, mean, m2 = self._add(n, mean, m2, extra)
+        return m2 / n if n else 0.0
+
+    def std(self, extra: float = None) -> float:
+        return math.sqrt(self.variance(extra))
+
+    def clear(self):
+        self.pos = self.n = 0
+        self.mean = self.m2 = 0.0
+
+
+class EwmaVariance:
+    """Moyenne/variance à pondération exponentielle (span en nombre de points)"""
+
+    def __init__(self, span: int):
+        self.alpha = 2.0 / (span + 1)
+        self.n = 0
+        self.mean = 0.0
+        self.var = 0.0
+
+    def __len__(self):
+        return self.n
+
+    def _step(self, mean, var, x):
+        delta = x - mean
+        increment = self.alpha * delta
+        return mean + increment, (1 - self.alpha) * (var + delta * increment)
+
+    def push(self, x: float):
+        if self.n == 0:
+            self.mean, self.var = x, 0.0
+        else:
+            self.mean, self.var = self._step(self.mean, self.var, x)
+        self.n += 1
+
+    def variance(self, extra: float = None) -> float:
+        if extra is None or self.n == 0:
+            return self.var
+        return self._step(self.mean, self.var, extra)[1]
+
+    def std(self, extra: float = None) -> float:
+        return math.sqrt(self.variance(extra))
+
+    def clear(self):
+        self.n = 0
+        self.mean = self.var = 0.0
+
+
+class TrendCounter:
+    """Somme des variations (+1 hausse, -1 baisse, 0 stable) sur les `period - 1` dernières, par période"""
+
+    def __init__(self, periods):
+        self.periods = sorted(periods)
+        self.capacity = max(self.periods)
+        self.signs = np.zeros(self.capacity, dtype=np.int8)
+        self.count = 0  # Variations reçues depuis le début
+        self.sums = {period: 0 for period in self.periods}
+
+    def _sign_back(self, k: int) -> int:
+        """Variation reçue il y a k pas (k = 1: la plus récente)"""
+        return int(self.signs[(self.count - k) % self.capacity])
+
+    def push(self, sign: int):
+        for period in self.periods:
+            width = period - 1
+            self.sums[period] += sign
+            if self.count >= width:
+                self.sums[period] -= self._sign_back(width)
+        self.signs[self.count % self.capacity] = sign
+        self.count += 1
+
+    def prices(self) -> int:
+        """Nombre de prix couverts (variations + 1)"""
+        return self.count + 1 if self.count else 0
+
+    def score(self, period: int, extra: int = None):
+        """(score, nb de variations) sur la fenêtre de la période, variation provisoire incluse"""
+        width = period - 1
+        total, count = self.sums[period], min(self.count, width)
+        if extra is not None:
+            if self.count >= width:
+                total -= self._sign_back(width)
+            else:
+                count += 1
+            total += extra
+        return total, count
+
+    def clear(self):
+        self.count = 0
+        self.sums = {period: 0 for period in self.periods}
+
+
+def sign(delta: float) -> int:
+    return (delta > 0) - (delta < 0)
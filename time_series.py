@@ -0,0 +1,167 @@
+"""
+Séries temporelles à mémoire constante pour l'historique du portfolio
+Tampons circulaires NumPy (float64) + niveaux sous-échantillonnés (jour, semaine)
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+RAW_SPAN = 3600  # Points bruts conservés: dernière heure
+
+# résolution -> (pas du sous-échantillonnage en secondes, capacité)
+DEFAULT_TIERS = {
+    'day': (60, 1440),     # Moyennes par minute sur 24h
+    'week': (600, 1008),   # Moyennes par 10 minutes sur 7 jours
+}
+RESOLUTIONS = ('hour',) + tuple(DEFAULT_TIERS)
+
+
+class RingSeries:
+    """Lignes (timestamp, valeurs...) à capacité fixe; les plus anciennes sont écrasées"""
+
+    def __init__(self, capacity: int, n_fields: int):
+        self.capacity = capacity
+        self.data = np.full((capacity, 1 + n_fields), np.nan)
+        self.start = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, row):
+        self.data[(self.start + self.size) % self.capacity] = row
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def view(self) -> np.ndarray:
+        """Copie ordonnée (du plus ancien au plus récent)"""
+        end = self.start + self.size
+        if end <= self.capacity:
+            return self.data[self.start:end].copy()
+        return np.concatenate((self.data[self.start:], self.data[:end - self.capacity]))
+
+    def since(self, t0: float) -> np.ndarray:
+        rows = self.view()
+        return rows[np.searchsorted(rows[:, 0], t0, side='left'):]
+
+    def clear(self):
+        self.start = 0
+        self.size = 0
+
+
+class DownsampledTier:
+    """Moyenne par intervalle de `step` secondes, intervalle en cours inclus dans les vues"""
+
+    def __init__(self, step: float, capacity: int, n_fields: int):
+        self.step = step
+        self.ring = RingSeries(capacity, n_fields)
+        self.bucket = None
+        self.sums = np.zeros(n_fields)
+        self.count = 0
+
+    def add(self, t: float, values: np.ndarray):
+        bucket = t - t % self.step
+        if self.bucket is not None and bucket != self.bucket:
+            self._close_bucket()
+        self.bucket = bucket
+        self.sums += values
+        self.count += 1
+
+    def _close_bucket(self):
+        if self.count:
+            self.ring.append(np.concatenate(([self.bucket], self.sums / self.count)))
+        self.sums[:] = 0.0
+        self.count = 0
+
+    def view(self) -> np.ndarray:
+        rows = self.ring.view()
+        if self.count:
+            partial = np.concatenate(([self.bucket], self.sums / self.count))
+            rows = np.vstack((rows, partial))
+        return rows
+
+    def clear(self):
+        self.ring.clear()
+        self.bucket = None
+        self.sums[:] = 0.0
+        self.count = 0
+
+
+class MultiResolutionSeries:
+    """Points bruts de la dernière heure + niveaux jour/semaine, mémoire bornée"""
+
+    def __init__(self, fields=('value', 'pnl'), raw_capacity: int = 3600, tiers=None):
+        self.fields = tuple(fields)
+        self.raw = RingSeries(raw_capacity, len(self.fields))
+        self.tiers = {name: DownsampledTier(step, capacity, len(self.fields))
+                      for name, (step, capacity) in (tiers or DEFAULT_TIERS).items()}
+        self.version = 0  # Incrémenté à chaque modification (invalidation des vues en cache)
+
+    def __len__(self):
+        return len(self.raw)
+
+    def append(self, t: float, *values):
+        values = np.asarray(values, dtype=np.float64)
+        self.version += 1
+        self.raw.append(np.concatenate(([t], values)))
+        for tier in self.tiers.values():
+            tier.add(t, values)
+
+    def view(self, resolution: str = 'hour') -> np.ndarray:
+        """Lignes (timestamp, champs...) de la résolution demandée"""
+        if resolution == 'hour':
+            rows = self.raw.view()
+            if len(rows):
+                rows = rows[np.searchsorted(rows[:, 0], rows[-1, 0] - RAW_SPAN, side='left'):]
+            return rows
+        if resolution not in self.tiers:
+            raise ValueError(f"Résolution inconnue: {resolution}")
+        return self.tiers[resolution].view()
+
+    def columns(self, resolution: str = 'hour') -> dict:
+        """Tableaux parallèles {timestamp (epoch), champ: [...]}"""
+        rows = self.view(resolution)
+        table = {'timestamp': rows[:, 0].tolist()}
+        for i, field in enumerate(self.fields, start=1):
+            table[field] = rows[:, i].tolist()
+        return table
+
+    def history(self, field: str, resolution: str = 'hour') -> list:
+        """Format historique de l'API: [{'timestamp': ISO, field: valeur}]"""
+        rows = self.view(resolution)
+        i = 1 + self.fields.index(field)
+        return [{'timestamp': datetime.fromtimestamp(row[0]).isoformat(), field: float(row[i])}
+                for row in rows]
+
+    def clear(self):
+        self.version += 1
+        self.raw.clear()
+        for tier in self.tiers.values():
+            tier.clear()
+
+    def to_dict(self) -> dict:
+        """État sérialisable (snapshot persistant)"""
+        return {
+            'raw': self.raw.view().tolist(),
+            'tiers': {name: {'rows': tier.ring.view().tolist(), 'bucket': tier.bucket,
+                             'sums': tier.sums.tolist(), 'count': tier.count}
+                      for name, tier in self.tiers.items()}
+        }
+
+    def load(self, data: dict):
+        """Restaure un état produit par to_dict (niveaux inconnus ignorés)"""
+        self.clear()
+        for row in data['raw']:
+            self.raw.append(row)
+        for name, state in data['tiers'].items():
+            tier = self.tiers.get(name)
+            if tier is None:
+                continue
+            for row in state['rows']:
+                tier.ring.append(row)
+            tier.bucket = state['bucket']
+            tier.sums[:] = state['sums']
+            tier.count = state['count']
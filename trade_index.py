@@ -0,0 +1,227 @@
+"""
+Index des trades fermés pour l'API paginée de /trades
+Positions par paire et par statut, dates de fermeture et P&L triés (global, par paire, par statut)
+Curseurs stables: (fermeture, id) ou (P&L, fermeture, id), jamais une position dans la liste
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+
+SORT_FIELDS = ('timestamp', 'pnl')
+
+
+def parse_time(value) -> float:
+    """Epoch (secondes) depuis un nombre ou une date ISO"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class TradeQuery:
+    """Filtres et tri d'une requête sur l'historique"""
+
+    def __init__(self, pair=None, status=None, leverage_min=None, leverage_max=None,
+                 pnl_min=None, pnl_max=None, since=None, until=None,
+                 sort='timestamp', order='desc', cursor=None, limit=50):
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Tri inconnu: {sort}")
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"Ordre inconnu: {order}")
+        self.pair = pair
+        self.status = status
+        self.leverage_min = leverage_min
+        self.leverage_max = leverage_max
+        self.pnl_min = pnl_min
+        self.pnl_max = pnl_max
+        self.since = parse_time(since) if since is not None else None
+        self.until = parse_time(until) if until is not None else None
+        self.sort = sort
+        self.order = order
+        self.cursor = cursor
+        self.limit = max(1, min(int(limit), 500))
+
+    def matches(self, trade: dict) -> bool:
+        """Filtres non indexés (levier, P&L)"""
+        leverage = trade.get('leverage', 1.0)
+        if self.leverage_min is not None and leverage < self.leverage_min:
+            return False
+        if self.leverage_max is not None and leverage > self.leverage_max:
+            return False
+        pnl = trade.get('pnl', 0)
+        if self.pnl_min is not None and pnl < self.pnl_min:
+            return False
+        if self.pnl_max is not None and pnl > self.pnl_max:
+            return False
+        return True
+
+
+class TradeIndex:
+    """Trades fermés dans l'ordre de fermeture + index maintenus à chaque fermeture"""
+
+    def __init__(self):
+        self.trades = []
+        self.closed_at = []    # Epoch de fermeture, croissant (même ordre que trades)
+        self.by_pair = {}      # paire -> positions croissantes dans trades
+        self.by_status = {}    # statut -> positions croissantes dans trades
+        self.by_pnl = []       # (pnl, position) triés
+        self.pnl_by_pair = {}    # paire -> (pnl, position) triés
+        self.pnl_by_status = {}  # statut -> (pnl, position) triés
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.trades)
+
+    def _append(self, trade: dict) -> int:
+        """Ajoute le trade aux index en ordre de fermeture (tout sauf by_pnl)"""
+        idx = len(self.trades)
+        closed_at = parse_time(trade.get('close_timestamp') or trade['timestamp'])
+        if self.closed_at and closed_at < self.closed_at[-1]:
+            closed_at = self.closed_at[-1]  # Horloge reculée: l'ordre de fermeture prime
+        self.trades.append(trade)
+        self.closed_at.append(closed_at)
+        self.by_pair.setdefault(trade.get('pair'), []).append(idx)
+        self.by_status.setdefault(trade.get('status'), []).append(idx)
+        return idx
+
+    def _pnl_lists(self, trade: dict) -> tuple:
+        return (self.by_pnl, self.pnl_by_pair.setdefault(trade.get('pair'), []),
+                self.pnl_by_status.setdefault(trade.get('status'), []))
+
+    def add(self, trade: dict):
+        """Indexe un trade fermé (dict de trades_history)"""
+        with self._lock:
+            idx = self._append(trade)
+            for entries in self._pnl_lists(trade):
+                insort(entries, (trade.get('pnl', 0), idx))
+
+    def clear(self):
+        with self._lock:
+            self.trades.clear()
+            self.closed_at.clear()
+            self.by_pair.clear()
+            self.by_status.clear()
+            self.by_pnl.clear()
+            self.pnl_by_pair.clear()
+            self.pnl_by_status.clear()
+
+    def _load(self, trades):
+        self.trades = []
+        self.closed_at = []
+        self.by_pair = {}
+        self.by_status = {}
+        self.by_pnl = []
+        self.pnl_by_pair = {}
+        self.pnl_by_status = {}
+        for trade in trades:
+            idx = self._append(trade)
+            for entries in self._pnl_lists(trade):
+                entries.append((trade.get('pnl', 0), idx))
+        # Un seul tri par liste plutôt qu'une insertion triée par trade
+        for entries in [self.by_pnl, *self.pnl_by_pair.values(), *self.pnl_by_status.values()]:
+            entries.sort()
+
+    def rebuild(self, trades):
+        """Remplace le contenu par un historique complet (ordre de fermeture)"""
+        with self._lock:
+            self._load(trades)
+
+    def prepend(self, trades):
+        """Ajoute des trades plus anciens que ceux déjà indexés (historique chargé en différé)"""
+        with self._lock:
+            self._load(list(trades) + self.trades)
+
+    def _candidates(self, query: TradeQuery, by_pair: dict, by_status: dict) -> list:
+        """Plus petite liste compatible avec les filtres indexés (None = toutes)"""
+        lists = []
+        if query.pair is not None:
+            lists.append(by_pair.get(query.pair, []))
+        if query.status is not None:
+            lists.append(by_status.get(query.status, []))
+        return min(lists, key=len) if lists else None
+
+    def _cursor_bounds(self, closed_at: float, trade_id: str):
+        """(avant, après): positions actuelles encadrant le trade du curseur
+
+        Recalculées à chaque requête: un prepend (historique chargé en différé) ne décale pas les pages
+        """
+        lo, hi = bisect_left(self.closed_at, closed_at), bisect_right(self.closed_at, closed_at)
+        for idx in range(lo, hi):
+            if self.trades[idx].get('id') == trade_id:
+                return idx, idx + 1
+        return lo, hi  # Trade disparu (reset): on reprend à sa date de fermeture
+
+    def _time_key(self, idx: int) -> str:
+        return f"{self.closed_at[idx]!r}:{self.trades[idx].get('id')}"
+
+    def _time_bounds(self, query: TradeQuery):
+        """Intervalle [lo, hi) de positions dans la fenêtre de temps"""
+        lo = bisect_left(self.closed_at, query.since) if query.since is not None else 0
+        hi = bisect_right(self.closed_at, query.until) if query.until is not None else len(self.trades)
+        return lo, hi
+
+    def _accept(self, idx: int, query: TradeQuery, lo: int, hi: int) -> bool:
+        if not lo <= idx < hi:
+            return False
+        trade = self.trades[idx]
+        if query.pair is not None and trade.get('pair') != query.pair:
+            return False
+        if query.status is not None and trade.get('status') != query.status:
+            return False
+        return query.matches(trade)
+
+    def _by_time(self, query: TradeQuery, lo: int, hi: int):
+        """Positions dans l'ordre de fermeture, à partir du curseur (fermeture:id)"""
+        candidates = self._candidates(query, self.by_pair, self.by_status)
+        if candidates is None:
+            candidates = range(len(self.trades))
+        start, stop = bisect_left(candidates, lo), bisect_left(candidates, hi)
+        if query.cursor is not None:
+            closed_at, _, trade_id = query.cursor.partition(':')
+            before, after = self._cursor_bounds(float(closed_at), trade_id)
+            if query.order == 'desc':
+                stop = min(stop, bisect_left(candidates, before))
+            else:
+                start = max(start, bisect_left(candidates, after))
+        positions = candidates[start:stop]
+        for idx in (reversed(positions) if query.order == 'desc' else positions):
+            yield idx, self._time_key(idx)
+
+    def _by_pnl(self, query: TradeQuery):
+        """Positions triées par P&L, à partir du curseur (pnl:fermeture:id)
+
+        Liste triée de la paire ou du statut filtré (la plus courte), sinon liste globale
+        """
+        entries = self._candidates(query, self.pnl_by_pair, self.pnl_by_status)
+        if entries is None:
+            entries = self.by_pnl
+        start, stop = 0, len(entries)
+        if query.cursor is not None:
+            pnl, closed_at, trade_id = query.cursor.split(':', 2)
+            before, after = self._cursor_bounds(float(closed_at), trade_id)
+            if query.order == 'desc':
+                stop = bisect_left(entries, (float(pnl), before))
+            else:
+                start = bisect_left(entries, (float(pnl), after))
+        span = range(stop - 1, start - 1, -1) if query.order == 'desc' else range(start, stop)
+        for i in span:
+            pnl, idx = entries[i]
+            yield idx, f"{pnl!r}:{self._time_key(idx)}"
+
+    def query(self, query: TradeQuery) -> dict:
+        """Page de trades + curseur de la page suivante (None à la fin)"""
+        with self._lock:
+            lo, hi = self._time_bounds(query)
+            ordered = self._by_time(query, lo, hi) if query.sort == 'timestamp' else self._by_pnl(query)
+            page, next_cursor = [], None
+            for idx, cursor in ordered:
+                if not self._accept(idx, query, lo, hi):
+                    continue
+                if len(page) == query.limit:
+                    break
+                page.append(self.trades[idx])
+                next_cursor = cursor
+            else:
+                next_cursor = None  # Plus rien après cette page
+            return {'trades': page, 'next_cursor': next_cursor}
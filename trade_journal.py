@@ -0,0 +1,165 @@
+"""
+Journal persistant des positions: segments append-only (JSON lines) + snapshots compacts
+Reprise au démarrage = dernier snapshot + rejeu du segment qui le suit;
+les trades fermés sont archivés à part (append-only) et rechargés en différé
+"""
+
+import glob
+import os
+import re
+from datetime import datetime
+
+from wire_format import encode_json, decode_json
+
+SNAPSHOT_VERSION = 1
+OPEN = 'open'
+CLOSE = 'close'
+
+
+def read_complete_lines(path: str, limit: int = None):
+    """(lignes JSON décodées, octets valides) - s'arrête à la première ligne incomplète"""
+    with open(path, 'rb') as f:
+        data = f.read() if limit is None else f.read(limit)
+    records, end = [], 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b'\n'):
+            break
+        try:
+            records.append(decode_json(line))
+        except ValueError:
+            break
+        end += len(line)
+    return records, end, len(data)
+
+
+class TradeJournal:
+    """Ouvertures/fermetures journalisées; chaque snapshot démarre un nouveau segment"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, 'snapshot.json')
+        self.archive_path = os.path.join(directory, 'trades.jsonl')
+        self.segment = 0
+        self.records_since_snapshot = 0
+        self.pending_trades = []  # Trades fermés pas encore archivés
+        self.archived = (0, 0)    # (nb de trades, octets) couverts par le dernier snapshot
+        self._file = None
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"journal-{segment:06d}.jsonl")
+
+    def _writer(self):
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(self._segment_path(self.segment), 'ab')
+        return self._file
+
+    def append(self, record: dict):
+        """Écrit un événement (une ligne JSON) et le pousse vers le système de fichiers"""
+        f = self._writer()
+        f.write(encode_json(record) + b'\n')
+        f.flush()
+        self.records_since_snapshot += 1
+
+    def record_open(self, pos_id, position: dict):
+        self.append({'op': OPEN, 'id': pos_id, 'position': position})
+
+    def record_close(self, pos_id, trade: dict):
+        self.append({'op': CLOSE, 'id': pos_id, 'trade': trade})
+        self.pending_trades.append(trade)
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def _archive_pending(self):
+        """Ajoute les trades fermés depuis le dernier snapshot à l'archive"""
+        count, size = self.archived
+        if self.pending_trades:
+            with open(self.archive_path, 'ab') as f:
+                f.write(b''.join(encode_json(trade) + b'\n' for trade in self.pending_trades))
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            count += len(self.pending_trades)
+        return count, size
+
+    def write_snapshot(self, state: dict):
+        """Archive les trades fermés, écrit un snapshot atomique puis bascule sur un segment vide"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.close()
+        archived = self._archive_pending()
+        next_segment = self.segment + 1
+        snapshot = dict(state, version=SNAPSHOT_VERSION, segment=next_segment,
+                        trades_count=archived[0], trades_bytes=archived[1],
+                        saved_at=datetime.now().isoformat())
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(encode_json(snapshot))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # Le snapshot couvre désormais les segments précédents
+        self.segment = next_segment
+        self.archived = archived
+        self.pending_trades = []
+        self.records_since_snapshot = 0
+        self._remove_segments(keep=self.segment)
+
+    def _remove_segments(self, keep=None):
+        for path in glob.glob(os.path.join(self.directory, 'journal-*.jsonl')):
+            match = re.search(r'journal-(\d+)\.jsonl$', path)
+            if match and int(match.group(1)) != keep:
+                os.remove(path)
+
+    def _truncate(self, path: str, size: int):
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            with open(path, 'r+b') as f:
+                f.truncate(size)
+
+    def load(self):
+        """(snapshot ou None, événements du segment courant) - sans charger l'archive des trades"""
+        snapshot = None
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = decode_json(f.read())
+        self.segment = snapshot['segment'] if snapshot else 0
+        self.archived = (snapshot['trades_count'], snapshot['trades_bytes']) if snapshot else (0, 0)
+        # Archive écrite mais snapshot non remplacé (arrêt brutal): ces trades sont encore dans le journal
+        self._truncate(self.archive_path, self.archived[1])
+
+        records = []
+        path = self._segment_path(self.segment)
+        if os.path.exists(path):
+            records, end, size = read_complete_lines(path)
+            if end < size:
+                # Arrêt brutal pendant une écriture: on repart de la dernière ligne complète
+                self._truncate(path, end)
+        self.pending_trades = [record['trade'] for record in records if record['op'] == CLOSE]
+        self.records_since_snapshot = len(records)
+        return snapshot, records
+
+    def load_archive(self) -> list:
+        """Trades fermés archivés (partie couverte par le snapshot chargé), en un seul décodage"""
+        count, size = self.archived
+        if not count:
+            return []
+        with open(self.archive_path, 'rb') as f:
+            data = f.read(size)
+        # Une ligne = un objet JSON sans saut de ligne brut: la liste se décode d'un bloc
+        return decode_json(b'[' + data.rstrip(b'\n').replace(b'\n', b',') + b']')
+
+    def reset(self):
+        """Efface snapshot, archive et segments (redémarrage à zéro explicite)"""
+        self.close()
+        for path in (self.snapshot_path, self.archive_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._remove_segments()
+        self.segment = 0
+        self.archived = (0, 0)
+        self.pending_trades = []
+        self.records_since_snapshot = 0
@@ -0,0 +1,68 @@
+"""
+Statistiques cumulées des trades fermés (globales et par paire)
+"""
+
+from dataclasses import dataclass, asdict
+
+
+@dataclass
+class TradeTotals:
+    """Compteurs d'un ensemble de trades fermés"""
+    count: int = 0
+    leveraged: int = 0
+    realized_pnl: float = 0.0
+    wins: int = 0
+    losses: int = 0
+
+    @property
+    def win_rate(self) -> float:
+        """Taux de réussite en % des trades fermés"""
+        return (self.wins / self.count) * 100 if self.count else 0.0
+
+    def add(self, pnl: float, leverage: float):
+        self.count += 1
+        if leverage > 1.0:
+            self.leveraged += 1
+        self.realized_pnl += pnl
+        if pnl > 0:
+            self.wins += 1
+        elif pnl < 0:
+            self.losses += 1
+
+
+class TradeStats:
+    """Accumulateurs mis à jour une seule fois à la fermeture de chaque position"""
+
+    def __init__(self):
+        self.total = TradeTotals()
+        self.by_pair = {}
+
+    def record(self, trade: dict):
+        """Ajoute un trade fermé (dict de trades_history) aux compteurs"""
+        pnl = trade.get('pnl', 0)
+        leverage = trade.get('leverage', 1.0)
+        self.total.add(pnl, leverage)
+        pair_totals = self.by_pair.get(trade.get('pair'))
+        if pair_totals is None:
+            pair_totals = self.by_pair[trade.get('pair')] = TradeTotals()
+        pair_totals.add(pnl, leverage)
+
+    def for_pair(self, pair) -> TradeTotals:
+        """Compteurs d'une paire (vides si aucun trade fermé)"""
+        return self.by_pair.get(pair) or TradeTotals()
+
+    def clear(self):
+        self.total = TradeTotals()
+        self.by_pair.clear()
+
+    def to_dict(self) -> dict:
+        """Compteurs sérialisables (snapshot persistant)"""
+        return {
+            'total': asdict(self.total),
+            'by_pair': {pair: asdict(totals) for pair, totals in self.by_pair.items()}
+        }
+
+    def load(self, data: dict):
+        """Restaure des compteurs produits par to_dict"""
+        self.total = TradeTotals(**data['total'])
+        self.by_pair = {pair: TradeTotals(**totals) for pair, totals in data['by_pair'].items()}
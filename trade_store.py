@@ -0,0 +1,176 @@
+"""
+Stockage SQLite (mode WAL) des trades fermés et du cycle de vie des positions
+Écritures groupées par cycle d'analyse, agrégats calculés par SQLite
+"""
+
+import os
+import sqlite3
+import threading
+
+from trade_index import parse_time
+from wire_format import encode_json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id TEXT NOT NULL,
+    pair TEXT NOT NULL,
+    status TEXT NOT NULL,
+    entry_price REAL,
+    exit_price REAL,
+    amount REAL,
+    leverage REAL,
+    effective_size REAL,
+    margin_used REAL,
+    pnl REAL,
+    opened_at REAL,
+    closed_at REAL NOT NULL,
+    UNIQUE (id, closed_at)
+);
+CREATE INDEX IF NOT EXISTS idx_trades_pair ON trades (pair);
+CREATE INDEX IF NOT EXISTS idx_trades_status ON trades (status);
+CREATE INDEX IF NOT EXISTS idx_trades_closed_at ON trades (closed_at);
+CREATE TABLE IF NOT EXISTS position_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    position_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    pair TEXT,
+    at REAL NOT NULL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_position_events_position ON position_events (position_id);
+"""
+
+TRADE_COLUMNS = ('id', 'pair', 'status', 'entry_price', 'exit_price', 'amount', 'leverage',
+                 'effective_size', 'margin_used', 'pnl', 'opened_at', 'closed_at')
+
+
+def trade_row(trade: dict) -> tuple:
+    """Dict de trades_history -> ligne de la table trades"""
+    return (
+        trade['id'], trade['pair'], trade['status'],
+        trade.get('entry_price', trade.get('price')), trade.get('exit_price'),
+        trade.get('amount'), trade.get('leverage', 1.0), trade.get('effective_size'),
+        trade.get('margin_used'), trade.get('pnl', 0.0),
+        parse_time(trade['timestamp']),
+        parse_time(trade.get('close_timestamp') or trade['timestamp'])
+    )
+
+
+class TradeStore:
+    """Base SQLite locale: un connexion d'écriture + une connexion de lecture par thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._writer = self._connect()
+        self._writer.executescript(SCHEMA)
+        self._write_lock = threading.Lock()
+        self._readers = threading.local()
+        self.pending_trades = []
+        self.pending_events = []
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")     # Lectures concurrentes pendant les écritures
+        conn.execute("PRAGMA synchronous=NORMAL")   # fsync au checkpoint (le journal JSON fait foi)
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._readers, 'conn', None)
+        if conn is None:
+            conn = self._readers.conn = self._connect()
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- Écritures (mises en attente puis une transaction par cycle)
+
+    def stage_trade(self, trade: dict):
+        self.pending_trades.append(trade_row(trade))
+
+    def stage_event(self, position_id, event: str, pair, at, data: dict = None):
+        payload = encode_json(data).decode('utf-8') if data is not None else None
+        self.pending_events.append((position_id, event, pair, parse_time(at), payload))
+
+    def _insert_trades(self, rows):
+        self._writer.executemany(
+            f"INSERT OR IGNORE INTO trades ({', '.join(TRADE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(TRADE_COLUMNS))})", rows)
+
+    def flush(self) -> int:
+        """Écrit les lignes en attente en une transaction; renvoie le nombre de lignes"""
+        with self._write_lock:
+            trades, events = self.pending_trades, self.pending_events
+            if not trades and not events:
+                return 0
+            self.pending_trades, self.pending_events = [], []
+            with self._writer:
+                self._insert_trades(trades)
+                self._writer.executemany(
+                    "INSERT INTO position_events (position_id, event, pair, at, data) VALUES (?, ?, ?, ?, ?)",
+                    events)
+            return len(trades) + len(events)
+
+    def add_trades(self, trades):
+        """Import direct en une transaction (rattrapage d'un historique existant), doublons ignorés"""
+        rows = [trade_row(trade) for trade in trades]
+        with self._write_lock, self._writer:
+            self._insert_trades(rows)
+        return len(rows)
+
+    def clear(self):
+        with self._write_lock:
+            self.pending_trades, self.pending_events = [], []
+            with self._writer:
+                self._writer.execute("DELETE FROM trades")
+                self._writer.execute("DELETE FROM position_events")
+
+    # --- Lectures analytiques
+
+    @staticmethod
+    def _filters(pair=None, since=None, until=None):
+        clauses, params = [], []
+        if pair is not None:
+            clauses.append("pair = ?")
+            params.append(pair)
+        if since is not None:
+            clauses.append("closed_at >= ?")
+            params.append(parse_time(since))
+        if until is not None:
+            clauses.append("closed_at <= ?")
+            params.append(parse_time(until))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+
+    def summary(self, pair=None, since=None, until=None) -> dict:
+        """Nb de trades, P&L, taux de réussite et levier moyen"""
+        where, params = self._filters(pair, since, until)
+        row = self._reader().execute(
+            "SELECT COUNT(*) AS trades, COALESCE(SUM(pnl), 0) AS pnl, "
+            "COALESCE(100.0 * SUM(pnl > 0) / COUNT(*), 0) AS win_rate, "
+            "COALESCE(AVG(leverage), 0) AS avg_leverage, "
+            "SUM(status = 'LIQUIDATION') AS liquidations "
+            f"FROM trades{where}", params).fetchone()
+        return {key: row[key] or 0 for key in row.keys()}
+
+    def by_pair(self, since=None, until=None) -> list:
+        where, params = self._filters(None, since, until)
+        rows = self._reader().execute(
+            "SELECT pair, COUNT(*) AS trades, SUM(pnl) AS pnl, "
+            "100.0 * SUM(pnl > 0) / COUNT(*) AS win_rate, AVG(leverage) AS avg_leverage "
+            f"FROM trades{where} GROUP BY pair ORDER BY pair", params)
+        return [dict(row) for row in rows]
+
+    def daily_pnl(self, pair=None, since=None, until=None) -> list:
+        """P&L par paire et par jour (UTC)"""
+        where, params = self._filters(pair, since, until)
+        rows = self._reader().execute(
+            "SELECT date(closed_at, 'unixepoch') AS day, pair, COUNT(*) AS trades, "
+            "SUM(pnl) AS pnl, 100.0 * SUM(pnl > 0) / COUNT(*) AS win_rate, AVG(leverage) AS avg_leverage "
+            f"FROM trades{where} GROUP BY day, pair ORDER BY day, pair", params)
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.flush()
+        self._writer.close()
@@ -0,0 +1,114 @@
+"""
+Index des seuils de déclenchement (stop-loss, take-profit, liquidation, margin call)
+Niveaux triés par paire: une mise à jour de prix ne touche que les positions franchies
+"""
+
+from bisect import bisect_left, bisect_right
+
+import position_rules
+
+# Marge relative pour ne jamais rater un seuil à l'arrondi près:
+# les candidats sont ensuite confirmés par Position.should_close
+LEVEL_TOLERANCE = 1e-9
+
+
+class SortedLevels:
+    """Niveaux de prix triés (listes parallèles niveaux / ids)"""
+
+    def __init__(self):
+        self.levels = []
+        self.ids = []
+
+    def add(self, level: float, pos_id: str):
+        i = bisect_right(self.levels, level)
+        self.levels.insert(i, level)
+        self.ids.insert(i, pos_id)
+
+    def remove(self, level: float, pos_id: str):
+        i = bisect_left(self.levels, level)
+        while self.ids[i] != pos_id:
+            i += 1
+        del self.levels[i]
+        del self.ids[i]
+
+    def at_or_above(self, price: float) -> list:
+        """Ids dont le niveau est >= price (déclenchement à la baisse)"""
+        return self.ids[bisect_left(self.levels, price * (1 - LEVEL_TOLERANCE)):]
+
+    def at_or_below(self, price: float) -> list:
+        """Ids dont le niveau est <= price (déclenchement à la hausse)"""
+        return self.ids[:bisect_right(self.levels, price * (1 + LEVEL_TOLERANCE))]
+
+    def __len__(self):
+        return len(self.levels)
+
+
+class PairTriggers:
+    """Seuils triés des positions d'une paire"""
+
+    def __init__(self):
+        self.stop_loss = SortedLevels()
+        self.take_profit = SortedLevels()
+        self.liquidation = SortedLevels()
+        self.margin_call = SortedLevels()
+
+
+class TriggerIndex:
+    """Seuils de toutes les positions actives, par paire"""
+
+    def __init__(self):
+        self.pairs = {}
+        self.levels = {}  # pos_id -> (pair, stop_loss, take_profit, liquidation, margin_call)
+
+    def add(self, pos_id, position):
+        levels = (
+            position.pair,
+            position_rules.stop_loss_price(position.entry_price),
+            position_rules.take_profit_price(position.entry_price),
+            position_rules.liquidation_price(position.entry_price, position.leverage),
+            position_rules.margin_call_price(position.entry_price, position.leverage)
+        )
+        pair, stop_loss, take_profit, liquidation, margin_call = levels
+        triggers = self.pairs.get(pair)
+        if triggers is None:
+            triggers = self.pairs[pair] = PairTriggers()
+        triggers.stop_loss.add(stop_loss, pos_id)
+        triggers.take_profit.add(take_profit, pos_id)
+        triggers.liquidation.add(liquidation, pos_id)
+        triggers.margin_call.add(margin_call, pos_id)
+        self.levels[pos_id] = levels
+
+    def remove(self, pos_id):
+        pair, stop_loss, take_profit, liquidation, margin_call = self.levels.pop(pos_id)
+        triggers = self.pairs[pair]
+        triggers.stop_loss.remove(stop_loss, pos_id)
+        triggers.take_profit.remove(take_profit, pos_id)
+        triggers.liquidation.remove(liquidation, pos_id)
+        triggers.margin_call.remove(margin_call, pos_id)
+        if not triggers.stop_loss:
+            del self.pairs[pair]
+
+    def clear(self):
+        self.pairs.clear()
+        self.levels.clear()
+
+    def crossed(self, pair, price: float) -> list:
+        """Ids des positions dont un seuil de fermeture est franchi à ce prix
+
+        Ordre fixe (stop-loss, liquidation puis take-profit, chacun par niveau): les fermetures
+        d'un même tick ne dépendent pas du hachage des chaînes (replay reproductible)
+        """
+        triggers = self.pairs.get(pair)
+        if triggers is None:
+            return []
+        crossed = dict.fromkeys(triggers.stop_loss.at_or_above(price))  # Ensemble ordonné
+        crossed.update(dict.fromkeys(triggers.liquidation.at_or_above(price)))
+        crossed.update(dict.fromkeys(triggers.take_profit.at_or_below(price)))
+        return list(crossed)
+
+    def in_margin_call(self, pair, price: float) -> list:
+        """Ids des positions sous leur prix d'alerte margin call"""
+        triggers = self.pairs.get(pair)
+        if triggers is None:
+            return []
+        return triggers.margin_call.at_or_above(price)
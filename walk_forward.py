@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Walk-forward des entrées de calculate_optimal_leverage: réglage sur une fenêtre glissante
+in-sample, évaluation sur la fenêtre out-of-sample suivante, courbe d'équité recousue
+Fenêtres évaluées en parallèle; indicateurs calculés une fois sur toute la série (cache .npy)
+par jeu de paramètres d'indicateurs, et partagés par toutes les fenêtres qui se chevauchent
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+import backtest
+from backtest import BacktestParams, Indicators
+from parameter_sweep import apply_overrides, grid_combinations, prepare_data, DEFAULT_CACHE_DIR, DEFAULT_CONFIG
+
+# Entrées de calculate_optimal_leverage réglées par défaut
+DEFAULT_SPACE = {
+    'leverage.crypto_max_leverage': [5, 10, 20],
+    'leverage.min_confidence_thresholds': [65.0, 75.0, 85.0],
+    'leverage.max_volatility_for_full_leverage': [2.0, 5.0, 8.0],
+}
+DURATION_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+# État des processus du pool (initialisé par init_worker)
+_worker = {}
+
+
+def parse_duration(value: str) -> float:
+    """'90d', '12h', '30m', '2w' ou secondes -> secondes"""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([mhdw]?)', str(value).strip())
+    if not match:
+        raise ValueError(f"Durée invalide: {value}")
+    return float(match.group(1)) * DURATION_UNITS.get(match.group(2), 1)
+
+
+def make_windows(start: float, end: float, train: float, test: float, step: float = None) -> list:
+    """[(début in-sample, début out-of-sample, fin out-of-sample)] glissant de `step` (= test par défaut)"""
+    step = step or test
+    windows = []
+    t = start
+    while t + train + test <= end:
+        windows.append((t, t + train, t + train + test))
+        t += step
+    return windows
+
+
+def cache_indicators(paths, params: BacktestParams, directory: str) -> list:
+    """Indicateurs de chaque paire sur toute la série, en .npy (2, n): confiance, volatilité
+
+    Réutilisés tant que les bougies et les paramètres d'indicateurs ne changent pas
+    """
+    key = hashlib.blake2b(repr(params.indicator_key()).encode(), digest_size=6).hexdigest()
+    folder = os.path.join(directory, f"indicators_{key}")
+    os.makedirs(folder, exist_ok=True)
+    cached = []
+    for path in paths:
+        target = os.path.join(folder, os.path.basename(path))
+        if not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(path):
+            ind = backtest.compute_indicators(backtest.load_bars(path), params)
+            np.save(target, np.vstack((ind.confidence, ind.volatility)))
+        cached.append(target)
+    return cached
+
+
+def init_worker(paths, indicator_paths, config_file):
+    """Chargé une fois par processus: bougies et indicateurs projetés en mémoire
+
+    `indicator_paths`: {clé d'indicateurs: [fichiers .npy]} (voir BacktestParams.indicator_key)
+    """
+    from config.intelligent_leverage_config import IntelligentLeverageConfig
+    _worker['dataset'] = backtest.load_dataset(paths)
+    _worker['indicators'] = {}
+    for key, files in indicator_paths.items():
+        indicators = _worker['indicators'][key] = {}
+        for path in files:
+            confidence, volatility = np.load(path, mmap_mode='r')
+            indicators[backtest.pair_from_path(path)] = Indicators(confidence, volatility)
+    _worker['config'] = IntelligentLeverageConfig(config_file)
+
+
+def combo_params(base, overrides: dict) -> BacktestParams:
+    return BacktestParams.from_config(apply_overrides(copy.deepcopy(base), overrides))
+
+
+def evaluate_window(task) -> dict:
+    """Réglage sur l'in-sample (meilleur `metric`, comptes ruinés écartés) puis évaluation out-of-sample"""
+    index, (train_start, test_start, test_end), combos, metric = task
+    dataset, indicators, base = _worker['dataset'], _worker['indicators'], _worker['config']
+
+    best, best_score, in_sample = None, None, None
+    for overrides in combos:
+        params = combo_params(base, overrides)
+        metrics = backtest.simulate(dataset, params, indicators[params.indicator_key()],
+                                    train_start, test_start).metrics()
+        score = (not metrics['ruined'], metrics[metric])
+        if best_score is None or score > best_score:
+            best, best_score, in_sample = overrides, score, metrics
+
+    params = combo_params(base, best)
+    result = backtest.simulate(dataset, params, indicators[params.indicator_key()], test_start, test_end)
+    return {
+        'index': index,
+        'in_sample': {'start': train_start, 'end': test_start, 'metrics': in_sample},
+        'out_of_sample': {'start': test_start, 'end': test_end, 'metrics': result.metrics()},
+        'overrides': best,
+        'equity_time': result.equity_time,
+        'equity': result.equity
+    }
+
+
+def stitch(windows: list, initial_balance: float):
+    """Courbes out-of-sample mises bout à bout: chaque fenêtre repart de la valeur finale de la précédente"""
+    times, values = [], []
+    level, last_time = initial_balance, -np.inf
+    for window in windows:
+        keep = window['equity_time'] > last_time  # Point de jonction compté une seule fois
+        curve = window['equity'][keep] - initial_balance + level
+        times.append(window['equity_time'][keep])
+        values.append(curve)
+        if len(curve):
+            level, last_time = curve[-1], times[-1][-1]
+    if not times:
+        return np.zeros(0), np.zeros(0)
+    return np.concatenate(times), np.concatenate(values)
+
+
+def run_walk_forward(paths, combos, windows, config_file=DEFAULT_CONFIG, metric='sharpe',
+                     workers=None, cache_dir=DEFAULT_CACHE_DIR) -> list:
+    """Fenêtres évaluées en parallèle, résultats dans l'ordre chronologique"""
+    from config.intelligent_leverage_config import IntelligentLeverageConfig
+    base = IntelligentLeverageConfig(config_file)
+    # Un cache d'indicateurs par valeur distincte des champs strategy.* de l'espace
+    by_key = {}
+    for overrides in combos:
+        params = combo_params(base, overrides)
+        by_key.setdefault(params.indicator_key(), params)
+    indicator_paths = {key: cache_indicators(paths, params, cache_dir) for key, params in by_key.items()}
+    tasks = [(i, window, combos, metric) for i, window in enumerate(windows)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=init_worker,
+                             initargs=(paths, indicator_paths, config_file)) as pool:
+        return list(pool.map(evaluate_window, tasks))
+
+
+def save_window_configs(results, config_file: str, directory: str):
+    """Configuration retenue pour chaque fenêtre, au format de save_config"""
+    from config.intelligent_leverage_config import IntelligentLeverageConfig
+    base = IntelligentLeverageConfig(config_file)
+    for window in results:
+        config = apply_overrides(copy.deepcopy(base), window['overrides'])
+        config.config_file = os.path.join(directory, f"window_{window['index']:03d}.json")
+        config.save_config()
+        window['config_file'] = config.config_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward du réglage du levier (in-sample / out-of-sample)")
+    parser.add_argument('data', nargs='+', help="Fichiers/dossiers de bougies (CSV, Parquet ou .npy)")
+    parser.add_argument('--train', default='90d', help="Durée in-sample (ex. 90d, 12h)")
+    parser.add_argument('--test', default='30d', help="Durée out-of-sample")
+    parser.add_argument('--step', help="Décalage entre fenêtres (défaut: durée out-of-sample)")
+    parser.add_argument('--space', help="JSON {'section.champ': [valeurs]} (défaut: entrées de calculate_optimal_leverage)")
+    parser.add_argument('--metric', default='sharpe', choices=('sharpe', 'profit_loss', 'win_rate'),
+                        help="Critère de sélection in-sample")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Processus du pool")
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help="Configuration de base")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_DIR, help="Dossier des .npy (bougies et indicateurs)")
+    parser.add_argument('--reports', default=backtest.REPORTS_DIR, help="Dossier des rapports")
+    args = parser.parse_args()
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    combos = grid_combinations(space)
+    paths = prepare_data(args.data, args.cache)
+
+    dataset = backtest.load_dataset(paths)
+    start = min(bars.time[0] for bars in dataset.values())
+    end = max(bars.time[-1] for bars in dataset.values()) + 1
+    windows = make_windows(start, end, parse_duration(args.train), parse_duration(args.test),
+                           parse_duration(args.step) if args.step else None)
+    if not windows:
+        parser.error("historique trop court pour une fenêtre in-sample + out-of-sample")
+
+    started = time.time()
+    print(f"🔁 {len(windows)} fenêtres x {len(combos)} combinaisons sur {args.workers} processus")
+    results = run_walk_forward(paths, combos, windows, args.config, args.metric, args.workers, args.cache)
+    elapsed = time.time() - started
+
+    from config.intelligent_leverage_config import IntelligentLeverageConfig
+    params = BacktestParams.from_config(IntelligentLeverageConfig(args.config))
+    equity_time, equity = stitch(results, params.initial_balance)
+    iso = lambda t: datetime.fromtimestamp(t, timezone.utc).isoformat()
+    for window in results:
+        oos = window['out_of_sample']['metrics']
+        print(f"🪟 {iso(window['out_of_sample']['start'])[:10]} | Sharpe OOS {oos['sharpe']:+.2f} | "
+              f"P&L ${oos['profit_loss']:+,.2f} | 💀 {oos['liquidations']} | {window['overrides']}")
+
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    config_dir = os.path.join(args.reports, f"walk_forward_{stamp}")
+    save_window_configs(results, args.config, config_dir)
+    summary = backtest.equity_metrics(equity, params.initial_balance, params.equity_step)
+    summary.update(
+        final_value=float(equity[-1]) if len(equity) else params.initial_balance,
+        liquidations=sum(w['out_of_sample']['metrics']['liquidations'] for w in results),
+        total_trades=sum(w['out_of_sample']['metrics']['total_trades'] for w in results)
+    )
+    report = {
+        'walk_forward_summary': {
+            'data': args.data, 'config': args.config, 'space': space, 'metric': args.metric,
+            'train': args.train, 'test': args.test, 'step': args.step or args.test,
+            'windows': len(results), 'workers': args.workers, 'elapsed_seconds': elapsed
+        },
+        'out_of_sample': summary,
+        'equity_curve': {'timestamp': equity_time.tolist(), 'value': equity.tolist()},
+        'windows': [{key: window[key] for key in ('index', 'in_sample', 'out_of_sample', 'overrides', 'config_file')}
+                    for window in results]
+    }
+    path = os.path.join(args.reports, f"walk_forward_{stamp}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Walk-forward en {elapsed:.1f}s | Sharpe OOS recousu {summary['sharpe']:+.2f} | "
+          f"Valeur finale ${summary['final_value']:,.2f}")
+    print(f"📝 Rapport: {path} (configurations dans {config_dir})")
+
+
+if __name__ == "__main__":
+    main()
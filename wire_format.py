@@ -0,0 +1,104 @@
+"""
+Encodage des réponses API: JSON rapide (orjson si installé), schéma compact
+et compression négociée (brotli si installé, sinon gzip)
+"""
+
+import gzip
+import json
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:  # Repli sur la bibliothèque standard
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # gzip seulement
+    brotli = None
+
+MIN_COMPRESS_SIZE = 1024   # En dessous, la compression ne vaut pas l'en-tête
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5         # Bon compromis vitesse/taille pour du JSON régénéré à chaque cycle
+
+# Champs horodatés convertis en epoch (secondes) par le schéma compact
+TIME_FIELDS = ('timestamp', 'close_timestamp')
+
+
+def encode_json(obj) -> bytes:
+    """JSON compact en UTF-8"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def decode_json(body: bytes):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def to_epoch(value):
+    """Date ISO -> epoch arrondi à la milliseconde (inchangé si déjà numérique/absent)"""
+    if isinstance(value, str):
+        return round(datetime.fromisoformat(value).timestamp(), 3)
+    return value
+
+
+def columns(rows: list, time_fields=TIME_FIELDS) -> dict:
+    """Liste de dicts -> dict de tableaux parallèles (clés de toutes les lignes)"""
+    keys = []
+    for row in rows:
+        for key in row:
+            if key not in keys:
+                keys.append(key)
+    table = {key: [row.get(key) for row in rows] for key in keys}
+    for key in time_fields:
+        if key in table:
+            table[key] = [to_epoch(value) for value in table[key]]
+    return table
+
+
+def history_columns(points: list, field: str) -> dict:
+    """Historique [{timestamp, field}] (ou nombres bruts) -> {timestamp: [...], field: [...]}"""
+    timestamps, values = [], []
+    for point in points:
+        if isinstance(point, dict):
+            timestamps.append(to_epoch(point.get('timestamp')))
+            values.append(point.get(field))
+        else:
+            timestamps.append(None)  # Point initial sans horodatage
+            values.append(point)
+    return {'timestamp': timestamps, field: values}
+
+
+def compact_payload(payload: dict) -> dict:
+    """Schéma compact de /api/intelligent-crypto: historiques et positions en colonnes, dates en epoch"""
+    portfolio = dict(payload['portfolio'])
+    portfolio['value_history'] = history_columns(portfolio.get('value_history', []), 'value')
+    portfolio['pnl_history'] = history_columns(portfolio.get('pnl_history', []), 'pnl')
+    positions = payload.get('active_positions', {})
+    return {
+        'schema': 'compact',
+        'portfolio': portfolio,
+        'cryptos': payload.get('cryptos', {}),
+        'active_positions': columns(list(positions.values())),
+        'position_risk': payload.get('position_risk', {})
+    }
+
+
+def choose_encoding(accept_encodings) -> str:
+    """Meilleur encodage accepté par le client (Accept-Encoding de werkzeug)"""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return 'identity'
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body